@@ -0,0 +1,72 @@
+"""Общий кеш постов для запросов API по id.
+
+Пост хранится целиком (со всеми полями POST_FIELDS, автором и
+группой) под ключом со штампом поста, а рядом — штампы автора и группы
+на момент записи. Запись верна, пока все три штампа совпадают с
+текущими: их меняют те же сигналы, что сбрасывают карточки лент
+(см. posts/cache.py). Одиночный и пакетный запросы читают и заполняют
+один и тот же кеш, промахи пакета добираются одним in_bulk().
+
+Посты, прочитанные с реплики, в кеш не пишутся: ключ известен до
+чтения строки, и отстающая реплика положила бы под новый штамп старую
+версию поста.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routers import reading_replica
+from posts.cache import get_stamps, stamp_key
+from posts.models import Post
+
+from .fields import POST_FIELDS, select_fields
+
+
+def entry_key(pk, stamp: str) -> str:
+    return f'api:post:{pk}:{stamp}'
+
+
+def related_keys(post):
+    return stamp_key('user', post.author_id), stamp_key('group', post.group_id)
+
+
+def get_posts(pks) -> dict:
+    """{id: пост} для найденных pks; несуществующих id в ответе нет."""
+    pks = list(dict.fromkeys(pks))
+    # Штамп поста появляется при первом сохранении или чтении; для
+    # несуществующих id он не создаётся, чтобы не засорять кеш.
+    post_stamps = cache.get_many([stamp_key('post', pk) for pk in pks])
+    keys = {
+        pk: entry_key(pk, post_stamps[stamp_key('post', pk)])
+        for pk in pks if stamp_key('post', pk) in post_stamps
+    }
+    entries = cache.get_many(list(keys.values()))
+    stamps = cache.get_many([
+        key for post, *_ in entries.values() for key in related_keys(post)
+    ])
+    found = {}
+    for post, *entry_stamps in entries.values():
+        if entry_stamps == [stamps.get(key) for key in related_keys(post)]:
+            found[post.pk] = post
+    missing = [pk for pk in pks if pk not in found]
+    if missing:
+        fetched = select_fields(
+            Post.objects.all(), POST_FIELDS, list(POST_FIELDS),
+            required=('author', 'group'),
+        ).in_bulk(missing)
+        found.update(fetched)
+        if not reading_replica():
+            store(fetched.values())
+    return found
+
+
+def store(posts):
+    stamp_keys = set()
+    for post in posts:
+        stamp_keys.add(stamp_key('post', post.pk))
+        stamp_keys.update(related_keys(post))
+    stamps = get_stamps(list(stamp_keys))
+    cache.set_many({
+        entry_key(post.pk, stamps[stamp_key('post', post.pk)]): (
+            post, *(stamps[key] for key in related_keys(post)))
+        for post in posts
+    }, settings.API_POST_CACHE_TIMEOUT)
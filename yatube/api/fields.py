@@ -0,0 +1,108 @@
+"""Поля ответов API и выборка только нужных колонок.
+
+Клиент перечисляет поля в параметре ?fields=id,text,author; по ним
+строятся select_related и only(), так что в запрос попадают только
+колонки и таблицы, которые нужны для ответа.
+"""
+from collections import namedtuple
+
+# columns — пути для only(), related — связь для select_related,
+# get(obj, request) — значение поля в ответе.
+Field = namedtuple('Field', 'columns related get')
+
+
+class QueryParamError(ValueError):
+    """Неверный параметр запроса; API отвечает на него 400."""
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+POST_FIELDS = {
+    'id': Field(('id',), None, lambda post, request: post.pk),
+    'text': Field(('text',), None, lambda post, request: post.text),
+    'pub_date': Field(('pub_date',), None,
+                      lambda post, request: isoformat(post.pub_date)),
+    'updated_at': Field(('updated_at',), None,
+                        lambda post, request: isoformat(post.updated_at)),
+    'author': Field(('author__username',), 'author',
+                    lambda post, request: post.author.username),
+    'group': Field(
+        ('group__slug',), 'group',
+        lambda post, request: post.group.slug if post.group else None),
+    'image': Field(
+        ('image',), None,
+        lambda post, request: request.build_absolute_uri(
+            post.image.url) if post.image else None),
+    'url': Field((), None, lambda post, request: request.build_absolute_uri(
+        post.get_absolute_url())),
+}
+
+GROUP_FIELDS = {
+    'slug': Field(('slug',), None, lambda group, request: group.slug),
+    'title': Field(('title',), None, lambda group, request: group.title),
+    'description': Field(('description',), None,
+                         lambda group, request: group.description),
+    'posts_count': Field(('posts_count',), None,
+                         lambda group, request: group.posts_count),
+    'followers_count': Field(('followers_count',), None,
+                             lambda group, request: group.followers_count),
+    'url': Field(('slug',), None,
+                 lambda group, request: request.build_absolute_uri(
+                     group.get_absolute_url())),
+}
+
+PROFILE_FIELDS = {
+    'username': Field(('username',), None,
+                      lambda user, request: user.username),
+    'full_name': Field(('first_name', 'last_name'), None,
+                       lambda user, request: user.get_full_name()),
+    'posts_count': Field(
+        ('post_stats__posts_count',), 'post_stats',
+        lambda user, request: stats(user).posts_count),
+    'followers_count': Field(
+        ('post_stats__followers_count',), 'post_stats',
+        lambda user, request: stats(user).followers_count),
+}
+
+
+def stats(user):
+    from posts.models import AuthorStats
+
+    try:
+        return user.post_stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats()
+
+
+def parse_fields(request, fields) -> list:
+    """Имена полей из ?fields=; без параметра — все поля."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(fields)
+    names = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise QueryParamError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(fields)}.')
+    return names
+
+
+def select_fields(queryset, fields, names, required=()):
+    """Запрос только к колонкам и связям выбранных полей."""
+    columns = set(required)
+    related = set()
+    for name in names:
+        columns.update(fields[name].columns)
+        if fields[name].related:
+            related.add(fields[name].related)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*sorted(columns))
+
+
+def serialize(obj, fields, names, request) -> dict:
+    return {name: fields[name].get(obj, request) for name in names}
@@ -0,0 +1,218 @@
+import gzip
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.routers import STICKY_COOKIE
+from posts.models import Group, Post
+
+User = get_user_model()
+TEST_POSTS_TOTAL = 15
+
+
+@override_settings(POST_PER_PAGE=10, API_MAX_LIMIT=20)
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='apiauthor', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа API',
+            slug='api-group',
+            description='Описание группы API',
+        )
+        # По одному, а не bulk_create: счётчики автора ведут сигналы.
+        for number in range(TEST_POSTS_TOTAL):
+            Post.objects.create(author=cls.user, text=f'Пост API No{number}',
+                                group=cls.group if number % 2 else None)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_json(self, path, status=200, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(response.content)
+
+    def test_posts_cursor_pagination(self):
+        """Курсоры next/previous обходят ленту без пропусков и повторов."""
+        first = self.get_json(reverse('api:posts'))
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.get_json(first['next'])
+        self.assertEqual(len(second['results']), TEST_POSTS_TOTAL - 10)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        expected = list(Post.objects.order_by('-pub_date', '-pk')
+                        .values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        back = self.get_json(second['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_sparse_fields(self):
+        """В ответе и в SQL только запрошенные поля."""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_json(reverse('api:posts'), fields='id,author')
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'apiauthor')
+        self.assertIn('fields=id%2Cauthor', data['next'])
+        feed_sql = queries.captured_queries[-1]['sql']
+        self.assertIn('JOIN "auth_user"', feed_sql)
+        self.assertNotIn('"posts_post"."text"', feed_sql)
+        self.assertNotIn('posts_group', feed_sql)
+
+    def test_all_fields_by_default(self):
+        post = Post.objects.filter(group=self.group).latest('pk')
+        data = self.get_json(
+            reverse('api:post_detail', args=(post.pk,)))
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertIsNone(data['image'])
+        self.assertEqual(
+            data['url'], f'http://testserver{post.get_absolute_url()}')
+
+    def test_group_and_profile(self):
+        group = self.get_json(
+            reverse('api:group_detail', args=(self.group.slug,)),
+            fields='slug,title')
+        self.assertEqual(group, {'slug': 'api-group', 'title': 'Группа API'})
+        posts = self.get_json(
+            reverse('api:group_posts', args=(self.group.slug,)), limit=20)
+        self.assertEqual(len(posts['results']), TEST_POSTS_TOTAL // 2)
+        profile = self.get_json(
+            reverse('api:profile_detail', args=(self.user.username,)))
+        self.assertEqual(profile['full_name'], 'Лев Толстой')
+        self.assertEqual(profile['posts_count'], TEST_POSTS_TOTAL)
+        posts = self.get_json(
+            reverse('api:profile_posts', args=(self.user.username,)),
+            limit=3)
+        self.assertEqual(len(posts['results']), 3)
+
+    def test_errors_are_json(self):
+        self.get_json(reverse('api:posts'), 400, fields='id,password')
+        self.get_json(reverse('api:posts'), 400, limit=21)
+        self.get_json(reverse('api:posts'), 400, limit='abc')
+        self.get_json(reverse('api:posts'), 400, limit='²')
+        self.get_json(reverse('api:group_detail', args=('nope',)), 404)
+        self.get_json(reverse('api:profile_posts', args=('nobody',)), 404)
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_gzip(self):
+        response = self.client.get(
+            reverse('api:posts'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 10)
+
+
+@override_settings(API_BATCH_MAX_IDS=5)
+class ApiBatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='batchauthor')
+        cls.group = Group.objects.create(
+            title='Группа пакета',
+            slug='batch-group',
+            description='Описание группы пакета',
+        )
+        cls.pks = [
+            Post.objects.create(author=cls.user, text=f'Пакет No{number}',
+                                group=cls.group).pk
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def batch(self, ids, status=200, **params):
+        response = self.client.get(
+            reverse('api:posts_batch'),
+            {'ids': ','.join(map(str, ids)), **params})
+        self.assertEqual(response.status_code, status)
+        return json.loads(response.content)
+
+    def test_request_order_and_not_found(self):
+        """Посты в порядке запроса, на месте ненайденных — маркер."""
+        first, second, third = self.pks
+        with self.assertNumQueries(1):
+            data = self.batch([third, 0, first, third], fields='id,text')
+        self.assertEqual(data['results'], [
+            {'id': third, 'text': 'Пакет No2'},
+            {'id': 0, 'error': 'not_found'},
+            {'id': first, 'text': 'Пакет No0'},
+            {'id': third, 'text': 'Пакет No2'},
+        ])
+
+    def test_shared_cache(self):
+        """Пакет и одиночный запрос читают один кеш."""
+        pks = self.pks
+        self.batch(pks[:2])
+        with self.assertNumQueries(0):
+            self.client.get(reverse('api:post_detail', args=(pks[0],)))
+        # В базу идут только промахи.
+        with self.assertNumQueries(1) as queries:
+            self.batch(pks)
+        self.assertIn(f'IN ({pks[2]})', queries.captured_queries[0]['sql'])
+        with self.assertNumQueries(0):
+            self.batch(pks)
+
+    def test_cache_invalidation(self):
+        post = Post.objects.get(pk=self.pks[0])
+        self.batch([post.pk])
+        post.text = 'Исправленный пакет'
+        post.save()
+        self.user.username = 'renamed'
+        self.user.save()
+        data = self.batch([post.pk], fields='text,author')
+        self.assertEqual(data['results'], [
+            {'text': 'Исправленный пакет', 'author': 'renamed'}])
+        post.delete()
+        response = self.client.get(
+            reverse('api:post_detail', args=(self.pks[0],)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_ids(self):
+        self.batch([], 400)
+        self.batch(['1', 'x'], 400)
+        self.batch(['²'], 400)
+        self.batch([10 ** 23], 400)
+        self.batch(range(1, 7), 400)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ApiReplicaTest(TestCase):
+    """В тестах реплика — отдельная пустая база, а не копия default."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lagging_replica_not_cached(self):
+        """Пост, прочитанный с отстающей реплики, не кешируется."""
+        user = User.objects.create_user(username='replicated')
+        post = Post.objects.create(author=user, text='Новый текст')
+        User.objects.using('replica').bulk_create([
+            User(pk=user.pk, username=user.username)])
+        Post.objects.using('replica').bulk_create([
+            Post(pk=post.pk, author_id=user.pk, text='Старый текст')])
+        address = reverse('api:post_detail', args=(post.pk,))
+        response = self.client.get(address, {'fields': 'text'})
+        self.assertEqual(json.loads(response.content)['text'], 'Старый текст')
+        self.client.cookies[STICKY_COOKIE] = str(time.time() + 60)
+        response = self.client.get(address, {'fields': 'text'})
+        self.assertEqual(json.loads(response.content)['text'], 'Новый текст')
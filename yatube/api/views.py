@@ -0,0 +1,154 @@
+"""JSON API для чтения лент, групп и профилей.
+
+Ленты отдаются страницами по курсору (как ?cursor= в HTML-лентах):
+в ответе есть ссылки next и previous, а COUNT(*) не считается.
+"""
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.gzip import gzip_page
+
+from core.routers import use_replica
+from posts.models import Group, Post, User
+from posts.utils import MAX_PK, CursorPaginator
+
+from .cache import get_posts
+from .fields import (GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS,
+                     QueryParamError, parse_fields, select_fields, serialize)
+
+# Только ASCII-цифры: str.isdigit() пропускает и «²», которое не
+# разбирает int().
+DIGITS_RE = re.compile(r'[0-9]+')
+
+
+def api_view(view_func):
+    """GET-представление API: чтение с реплики, gzip и ошибки в JSON."""
+    @use_replica
+    @gzip_page
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = JsonResponse(
+                {'detail': f'Метод {request.method} не поддерживается.'},
+                status=405)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            return view_func(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Не найдено.'}, status=404)
+        except QueryParamError as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+    return wrapper
+
+
+def parse_limit(request) -> int:
+    raw = request.GET.get('limit')
+    if raw is None:
+        return settings.POST_PER_PAGE
+    if (not DIGITS_RE.fullmatch(raw)
+            or not 0 < int(raw) <= settings.API_MAX_LIMIT):
+        raise QueryParamError(
+            f'limit должен быть от 1 до {settings.API_MAX_LIMIT}.')
+    return int(raw)
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def post_list(request, queryset):
+    names = parse_fields(request, POST_FIELDS)
+    # id и pub_date нужны для курсоров, даже если их не запросили.
+    posts = select_fields(queryset, POST_FIELDS, names,
+                          required=('id', 'pub_date'))
+    page = CursorPaginator(posts, parse_limit(request)).cursor_page(
+        request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize(post, POST_FIELDS, names, request)
+                    for post in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def detail(request, queryset, fields, required, **lookup):
+    names = parse_fields(request, fields)
+    obj = get_object_or_404(
+        select_fields(queryset, fields, names, required), **lookup)
+    return JsonResponse(serialize(obj, fields, names, request),
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def posts(request):
+    return post_list(request, Post.objects.all())
+
+
+def parse_ids(request) -> list:
+    raw = request.GET.get('ids', '')
+    ids = [part.strip() for part in raw.split(',') if part.strip()]
+    if not ids or not all(DIGITS_RE.fullmatch(part)
+                          and int(part) <= MAX_PK for part in ids):
+        raise QueryParamError('ids — список id постов через запятую.')
+    if len(ids) > settings.API_BATCH_MAX_IDS:
+        raise QueryParamError(
+            f'Не больше {settings.API_BATCH_MAX_IDS} id за запрос.')
+    return [int(part) for part in ids]
+
+
+@api_view
+def post_detail(request, post_id):
+    names = parse_fields(request, POST_FIELDS)
+    post = get_posts([post_id]).get(post_id)
+    if post is None:
+        raise Http404
+    return JsonResponse(serialize(post, POST_FIELDS, names, request),
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def posts_batch(request):
+    """Посты по списку ?ids= в порядке запроса, за один поход в базу.
+
+    На месте ненайденного поста — {"id": ..., "error": "not_found"}.
+    """
+    names = parse_fields(request, POST_FIELDS)
+    ids = parse_ids(request)
+    posts = get_posts(ids)
+    return JsonResponse({'results': [
+        serialize(posts[pk], POST_FIELDS, names, request) if pk in posts
+        else {'id': pk, 'error': 'not_found'}
+        for pk in ids
+    ]}, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def group_detail(request, slug):
+    return detail(request, Group.objects.all(), GROUP_FIELDS, ('id',),
+                  slug=slug)
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return post_list(request, group.posts.all())
+
+
+@api_view
+def profile_detail(request, username):
+    return detail(request, User.objects.all(), PROFILE_FIELDS, ('id',),
+                  username=username)
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return post_list(request, author.posts.all())
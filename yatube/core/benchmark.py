@@ -0,0 +1,144 @@
+"""Общие помощники для команд-бенчмарков: наполнение базы и замеры."""
+import time
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .metrics import percentile
+
+User = get_user_model()
+
+SEED_PREFIX = 'bench'
+HOST = '127.0.0.1'
+
+
+def seed_posts(total: int, authors: int = 10, groups: int = 5,
+               batch_size: int = 5000, seed: int = 0):
+    """Создаёт авторов, группы и total постов со случайным текстом.
+
+    Авторы и группы создаются через mixer, посты — пачками bulk_create
+    с текстом от Faker. Возвращает кортеж (авторы, группы).
+    """
+    from posts.models import Group, Post
+
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    author_list = mixer.cycle(authors).blend(
+        User,
+        username=mixer.sequence(f'{SEED_PREFIX}_author_{{0}}'),
+        first_name=fake.first_name,
+        last_name=fake.last_name,
+    )
+    group_list = mixer.cycle(groups).blend(
+        Group,
+        title=fake.catch_phrase,
+        slug=mixer.sequence(f'{SEED_PREFIX}-group-{{0}}'),
+        description=fake.paragraph,
+    )
+    batch = []
+    for i in range(total):
+        batch.append(Post(
+            text=f'{fake.sentence(nb_words=12)} No{i}',
+            author=author_list[i % authors],
+            group=group_list[i % groups] if i % 3 else None,
+        ))
+        if len(batch) == batch_size:
+            Post.objects.bulk_create(batch)
+            batch = []
+    Post.objects.bulk_create(batch)
+    # bulk_create не вызывает сигналы, поэтому счётчики и поисковый
+    # индекс перестраиваем отдельно.
+    call_command('rebuild_post_counters', stdout=StringIO())
+    call_command('rebuild_search_index', stdout=StringIO())
+    return author_list, group_list
+
+
+def remove_seeded():
+    """Удаляет авторов и группы seed_posts вместе с их постами."""
+    from posts.models import Group
+
+    User.objects.filter(username__startswith=f'{SEED_PREFIX}_').delete()
+    Group.objects.filter(slug__startswith=f'{SEED_PREFIX}-').delete()
+
+
+@contextmanager
+def seeded(*args, **kwargs):
+    """Как seed_posts, но с фиксацией данных и удалением после блока.
+
+    Нужен, когда запросы идут из других потоков со своими подключениями:
+    данные незавершённой транзакции они бы не увидели.
+    """
+    remove_seeded()
+    try:
+        yield seed_posts(*args, **kwargs)
+    finally:
+        remove_seeded()
+
+
+@contextmanager
+def rollback_after(keep: bool = False):
+    """Выполняет блок в транзакции и откатывает её, если не keep."""
+    with transaction.atomic():
+        yield
+        if not keep:
+            transaction.set_rollback(True)
+
+
+def timed(func, repeat: int):
+    """Вызывает func repeat раз и возвращает список длительностей в мс."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings) -> dict:
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'max_ms': round(max(timings), 3) if timings else 0.0,
+    }
+
+
+def session_cookie(user) -> str:
+    """Значение заголовка Cookie с сессией, в которой вошёл user."""
+    client = Client()
+    client.force_login(user)
+    session = client.cookies[settings.SESSION_COOKIE_NAME]
+    return f'{settings.SESSION_COOKIE_NAME}={session.value}'
+
+
+def wsgi_get(application, path: str, cookie: str = ''):
+    """GET-запрос напрямую к WSGI-приложению: (время в мс, статус).
+
+    В отличие от тестового клиента, запрос проходит весь жизненный
+    цикл обработчика, включая закрытие подключений по CONN_MAX_AGE.
+    """
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'SERVER_NAME': HOST,
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie,
+        'wsgi.input': BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    status = []
+    started = time.perf_counter()
+    response = application(environ, lambda code, headers: status.append(code))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return ((time.perf_counter() - started) * 1000,
+            int(status[0].split()[0]))
@@ -0,0 +1,29 @@
+"""Проверки настроек проекта, которые выполняет manage.py check."""
+from django.conf import settings
+from django.core import checks
+
+# Бэкенды кеша, содержимое которых видно только одному процессу.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias: str = 'default') -> bool:
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+@checks.register(checks.Tags.caches)
+def check_tasks_cache(app_configs, **kwargs):
+    """Задачи воркера сбрасывают кеши, которые читают веб-процессы."""
+    if settings.TASKS_EAGER or cache_is_shared():
+        return []
+    return [checks.Error(
+        'Задачи выполняет воркер run_tasks (TASKS_EAGER выключен), а кеш '
+        'у каждого процесса свой: сброс карточек и страниц из задач не '
+        'дойдёт до веб-процессов.',
+        hint='Укажите общий кеш в CACHE_BACKEND и CACHE_LOCATION '
+             '(например, FileBasedCache или memcached) или включите '
+             'TASKS_EAGER.',
+        id='core.E001',
+    )]
@@ -0,0 +1,125 @@
+"""Удаление из CSS правил, которые не используют наши шаблоны.
+
+Из исходников проекта (шаблонов и модулей Python) берутся все слова,
+похожие на имена классов, и в CSS остаются только селекторы, все
+классы которых встречаются среди этих слов. Селекторы без классов
+(html, body, a, :root), @font-face и @keyframes остаются как есть,
+правила внутри @media и @supports проверяются так же, как снаружи.
+"""
+import os
+import re
+
+TOKEN_RE = re.compile(r'[A-Za-z0-9_-]+')
+CLASS_RE = re.compile(r'\.(-?[A-Za-z_][A-Za-z0-9_-]*)')
+NOT_RE = re.compile(r':not\([^)]*\)')
+NESTED_AT_RULES = ('@media', '@supports')
+SOURCE_EXTENSIONS = ('.html', '.py', '.txt')
+
+
+def source_tokens(roots) -> set:
+    """Слова из шаблонов и модулей в каталогах roots."""
+    tokens = set()
+    for root in roots:
+        for directory, _, files in os.walk(root):
+            for name in files:
+                if not name.endswith(SOURCE_EXTENSIONS):
+                    continue
+                path = os.path.join(directory, name)
+                with open(path, encoding='utf-8', errors='ignore') as file:
+                    tokens.update(TOKEN_RE.findall(file.read()))
+    return tokens
+
+
+def _skip_string(css: str, index: int) -> int:
+    """Индекс символа после строки в кавычках, начатой в index."""
+    quote = css[index]
+    index += 1
+    while css[index] != quote:
+        index += 2 if css[index] == '\\' else 1
+    return index + 1
+
+
+def _block_end(css: str, index: int) -> int:
+    """Индекс закрывающей скобки для «{» в позиции index."""
+    depth = 0
+    while True:
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if not depth:
+                return index
+        index += 1
+
+
+def split_blocks(css: str):
+    """Делит CSS на блоки верхнего уровня.
+
+    Возвращает пары (заголовок, тело) для правил и at-правил с телом
+    и пары (текст, None) для комментариев и инструкций вроде @charset.
+    """
+    blocks = []
+    start = index = 0
+    while index < len(css):
+        char = css[index]
+        if css.startswith('/*', index):
+            end = css.index('*/', index) + 2
+            blocks.append((css[index:end], None))
+            start = index = end
+        elif char in '"\'':
+            index = _skip_string(css, index)
+        elif char == ';':
+            blocks.append((css[start:index + 1].strip(), None))
+            start = index = index + 1
+        elif char == '{':
+            end = _block_end(css, index)
+            blocks.append((css[start:index].strip(), css[index + 1:end]))
+            start = index = end + 1
+        else:
+            index += 1
+    return blocks
+
+
+def split_selectors(prelude: str):
+    """Делит список селекторов по запятым вне скобок."""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return [selector.strip() for selector in selectors]
+
+
+def is_used(selector: str, tokens) -> bool:
+    # Классы внутри :not() не нужны, чтобы селектор сработал.
+    classes = CLASS_RE.findall(NOT_RE.sub('', selector))
+    return all(name in tokens for name in classes)
+
+
+def purge(css: str, tokens) -> str:
+    """CSS без правил, селекторы которых не встречаются в tokens."""
+    kept = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            kept.append(prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = purge(body, tokens)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            kept.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [selector for selector in split_selectors(prelude)
+                         if is_used(selector, tokens)]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(kept)
@@ -0,0 +1,104 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import rollback_after, seed_posts, summarize, timed
+from posts.models import Post
+
+# Поля, которые клиенты на деле берут из карточки поста.
+CARD_FIELDS = 'id,text,pub_date,author,group,url'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер и время ответа лент в HTML и в JSON API '
+            'на одних и тех же данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500,
+                            help='Сколько постов создать.')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Сколько раз запросить каждую страницу.')
+        parser.add_argument('--batch', type=int, default=20,
+                            help='Сколько постов запросить по id: по '
+                                 'одному и одним пакетом.')
+
+    def handle(self, *args, **options):
+        with rollback_after():
+            authors, groups = seed_posts(options['posts'])
+            author, group = authors[0], groups[0]
+            # Вошедший пользователь: HTML-ленты не отдаются из кеша страниц.
+            client = Client(HTTP_ACCEPT_ENCODING='gzip')
+            client.force_login(author)
+            pages = {
+                'index': (
+                    reverse('posts:index'),
+                    reverse('api:posts')),
+                'group': (
+                    reverse('posts:group_list', args=(group.slug,)),
+                    reverse('api:group_posts', args=(group.slug,))),
+                'profile': (
+                    reverse('posts:profile', args=(author.username,)),
+                    reverse('api:profile_posts', args=(author.username,))),
+            }
+            report = {'posts': options['posts'], 'pages': {}}
+            for name, (html, api) in pages.items():
+                report['pages'][name] = {
+                    'html': self.measure(client, html, options['repeat']),
+                    'api': self.measure(client, api, options['repeat']),
+                    'api_sparse': self.measure(
+                        client, f'{api}?fields={CARD_FIELDS}',
+                        options['repeat']),
+                }
+            pks = list(Post.objects.values_list('pk', flat=True)
+                       [:options['batch']])
+            report['by_id'] = self.measure_by_id(
+                client, pks, options['repeat'])
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def measure(client, path, repeat) -> dict:
+        cache.clear()
+        response = client.get(path)
+        body = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            raw, compressed = gzip.decompress(body), body
+        else:
+            # HTML сжимает веб-сервер; считаем, сколько бы он отдал.
+            raw, compressed = body, gzip.compress(body)
+        return {
+            'status': response.status_code,
+            'bytes': len(raw),
+            'gzip_bytes': len(compressed),
+            **summarize(timed(lambda: client.get(path), repeat)),
+        }
+
+    @staticmethod
+    def measure_by_id(client, pks, repeat) -> dict:
+        """Посты по id: отдельными запросами и одним пакетным."""
+        singles = [reverse('api:post_detail', args=(pk,)) for pk in pks]
+        batch = reverse('api:posts_batch')
+        params = {'ids': ','.join(map(str, pks))}
+        report = {'posts': len(pks)}
+        for cache_state in ('cold', 'warm'):
+            def cold():
+                if cache_state == 'cold':
+                    cache.clear()
+
+            def get_singles():
+                cold()
+                for path in singles:
+                    client.get(path)
+
+            def get_batch():
+                cold()
+                client.get(batch, params)
+
+            report[cache_state] = {
+                'single': summarize(timed(get_singles, repeat)),
+                'batch': summarize(timed(get_batch, repeat)),
+            }
+        return report
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.wsgi import WsgiToAsgi
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from core.benchmark import HOST, seeded, session_cookie, summarize, wsgi_get
+from yatube.asgi import PooledWsgiToAsgi
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность лент при одновременных '
+            'запросах через WSGI и через ASGI на одних и тех же данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000,
+                            help='Сколько постов создать.')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Сколько запросов сделать в каждом режиме.')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Сколько запросов выполняется одновременно.')
+        parser.add_argument('--query-latency-ms', type=float, default=0,
+                            help='Добавочная задержка каждого SQL-запроса: '
+                                 'имитирует сетевую базу данных.')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Запрашивать страницы без авторизации '
+                                 '(их отдаёт кеш страниц).')
+
+    def handle(self, *args, **options):
+        with seeded(options['posts']) as (authors, groups):
+            author = authors[0]
+            post = author.posts.latest('pk')
+            paths = [
+                reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': groups[0].slug}),
+                reverse('posts:profile',
+                        kwargs={'username': author.username}),
+                reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            ]
+            cookie = ''
+            if not options['anonymous']:
+                cookie = session_cookie(author)
+            urls = [paths[i % len(paths)]
+                    for i in range(options['requests'])]
+            if options['query_latency_ms']:
+                self.add_query_latency(options['query_latency_ms'])
+            wsgi = get_wsgi_application()
+            modes = {
+                'wsgi_threads': lambda: self.run_wsgi(
+                    wsgi, urls, cookie, options['concurrency']),
+                'asgi_pooled': lambda: self.run_asgi(
+                    PooledWsgiToAsgi(wsgi, options['concurrency']),
+                    urls, cookie, options['concurrency']),
+                'asgi_default_adapter': lambda: self.run_asgi(
+                    WsgiToAsgi(wsgi), urls, cookie, options['concurrency']),
+            }
+            report = {
+                'posts': options['posts'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'anonymous': options['anonymous'],
+                'query_latency_ms': options['query_latency_ms'],
+                'modes': {},
+            }
+            for name, run in modes.items():
+                started = time.perf_counter()
+                timings, statuses = run()
+                elapsed = time.perf_counter() - started
+                result = {
+                    'rps': round(len(timings) / elapsed, 1),
+                    'errors': sum(status != 200 for status in statuses),
+                }
+                result.update(summarize(timings))
+                report['modes'][name] = result
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def add_query_latency(latency_ms):
+        """Замедляет запросы подключений, открытых в потоках запросов.
+
+        Подключение основного потока уже открыто при наполнении базы,
+        поэтому наполнение и очистка данных не замедляются.
+        """
+        def slow_execute(execute, sql, params, many, context):
+            time.sleep(latency_ms / 1000)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Сигнал приходит и при переподключении того же объекта.
+            if slow_execute not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_execute)
+
+        connection_created.connect(add_delay, weak=False)
+
+    @staticmethod
+    def run_wsgi(application, urls, cookie, concurrency):
+        request = partial(wsgi_get, application, cookie=cookie)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(request, urls))
+        return [timing for timing, _ in results], [
+            status for _, status in results]
+
+    @staticmethod
+    def run_asgi(application, urls, cookie, concurrency):
+        async def request(path, semaphore):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'root_path': '',
+                'query_string': b'',
+                'headers': [(b'host', HOST.encode()),
+                            (b'cookie', cookie.encode())],
+                'server': (HOST, 80),
+                'client': (HOST, 50000),
+            }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                messages.append(message)
+
+            async with semaphore:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                return ((time.perf_counter() - started) * 1000,
+                        messages[0]['status'])
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(request(path, semaphore) for path in urls))
+
+        results = asyncio.run(run_all())
+        return [timing for timing, _ in results], [
+            status for _, status in results]
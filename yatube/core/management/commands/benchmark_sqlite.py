@@ -0,0 +1,173 @@
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connections
+from django.test import override_settings
+from django.urls import reverse
+
+from core.benchmark import seeded, session_cookie, summarize, wsgi_get
+from core.sqlite import apply_pragmas
+from posts.models import Post
+
+# Настройки SQLite по умолчанию, записанные явно: режим журнала хранится
+# в самом файле базы, и его нужно вернуть после прогона с WAL.
+BASELINE = {
+    'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'conn_max_age': 0,
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность одновременных чтений лент '
+            'и публикаций постов с настройками SQLite по умолчанию и с '
+            'профилем production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000,
+                            help='Сколько постов создать.')
+        parser.add_argument('--seconds', type=float, default=5,
+                            help='Длительность прогона каждого профиля.')
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Сколько потоков читают ленты.')
+        parser.add_argument('--writers', type=int, default=2,
+                            help='Сколько потоков публикуют посты.')
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default': BASELINE,
+            'production': {
+                'pragmas': settings.SQLITE_PRODUCTION_PRAGMAS,
+                'conn_max_age': 600,
+            },
+        }
+        database = connections.databases['default']
+        journal_mode = self.journal_mode()
+        conn_max_age = database['CONN_MAX_AGE']
+        report = {
+            'posts': options['posts'],
+            'seconds': options['seconds'],
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'profiles': {},
+        }
+        # Ошибки «database is locked» считаются в отчёте, а не в логе.
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with seeded(options['posts']) as (authors, groups):
+                paths = [
+                    reverse('posts:index'),
+                    reverse('posts:group_list',
+                            kwargs={'slug': groups[0].slug}),
+                    reverse('posts:profile',
+                            kwargs={'username': authors[0].username}),
+                ]
+                cookie = session_cookie(authors[0])
+                for name, profile in profiles.items():
+                    connections.close_all()
+                    database['CONN_MAX_AGE'] = profile['conn_max_age']
+                    with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+                        report['profiles'][name] = self.run_profile(
+                            paths, cookie, authors, groups, options)
+                connections.close_all()
+                database['CONN_MAX_AGE'] = conn_max_age
+                connections['default'].ensure_connection()
+                apply_pragmas(connections['default'],
+                              {'journal_mode': journal_mode})
+        finally:
+            request_logger.setLevel(log_level)
+        default = report['profiles']['default']
+        production = report['profiles']['production']
+        for key in ('reads_per_s', 'writes_per_s'):
+            report[f'{key}_gain'] = round(
+                production[key] / default[key], 2) if default[key] else None
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def journal_mode() -> str:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def run_profile(self, paths, cookie, authors, groups, options):
+        application = get_wsgi_application()
+        deadline = time.monotonic() + options['seconds']
+        reads, writes = [], []
+        errors = {'read': 0, 'write': 0}
+        lock = threading.Lock()
+
+        def reader(number):
+            timings, failed = [], 0
+            while time.monotonic() < deadline:
+                path = paths[(number + len(timings)) % len(paths)]
+                timing, status = wsgi_get(application, path, cookie)
+                timings.append(timing)
+                failed += status != 200
+            with lock:
+                reads.extend(timings)
+                errors['read'] += failed
+            connections.close_all()
+
+        def writer(number):
+            timings, failed = [], 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                if self.publish(number, authors, groups):
+                    timings.append((time.perf_counter() - started) * 1000)
+                else:
+                    failed += 1
+            with lock:
+                writes.extend(timings)
+                errors['write'] += failed
+            connections.close_all()
+
+        threads = [
+            threading.Thread(target=reader, args=(number,))
+            for number in range(options['readers'])
+        ] + [
+            threading.Thread(target=writer, args=(number,))
+            for number in range(options['writers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'reads_per_s': round(len(reads) / elapsed, 1),
+            'writes_per_s': round(len(writes) / elapsed, 1),
+            'read_errors': errors['read'],
+            'write_errors': errors['write'],
+            'read': summarize(reads),
+            'write': summarize(writes),
+        }
+
+    @staticmethod
+    def publish(number, authors, groups) -> bool:
+        """Публикует пост так же, как post_create, в рамках «запроса».
+
+        Сигналы начала и конца запроса закрывают подключение по
+        CONN_MAX_AGE, как в обработчике WSGI.
+        """
+        request_started.send(sender=WSGIHandler)
+        try:
+            Post.objects.create(
+                text=f'Бенчмарк SQLite, писатель {number}',
+                author=random.choice(authors),
+                group=random.choice(groups),
+            )
+            return True
+        except DatabaseError:
+            return False
+        finally:
+            request_finished.send(sender=WSGIHandler)
@@ -0,0 +1,70 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.benchmark import rollback_after, seed_posts, summarize, timed
+from core.reverse import _reverse, cached_reverse
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Замеряет, сколько времени страница ленты тратит на построение '
+            'ссылок: reverse() против запомненных cached_reverse().')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Сколько раз отрисовать страницу.')
+
+    def handle(self, *args, **options):
+        with rollback_after():
+            authors, _ = seed_posts(settings.POST_PER_PAGE)
+            posts = list(Post.objects.for_feed()[:settings.POST_PER_PAGE])
+            request = RequestFactory().get(reverse('posts:index'))
+            request.user = authors[0]
+            links = self.page_links(posts)
+            header = get_template('includes/header.html')
+            article = get_template('includes/article.html')
+
+            def render_page():
+                header.render({'request': request, 'user': request.user})
+                for post in posts:
+                    article.render({'request': request, 'post': post})
+
+            def render_cold():
+                # Пустой кеш на каждой отрисовке — то же, что {% url %}.
+                _reverse.cache_clear()
+                render_page()
+
+            report = {
+                'links_per_page': len(links),
+                'reverse': summarize(timed(
+                    lambda: [reverse(name, args=args)
+                             for name, args in links], options['repeat'])),
+                'cached_reverse': summarize(timed(
+                    lambda: [cached_reverse(name, *args)
+                             for name, args in links], options['repeat'])),
+                'render_uncached': summarize(
+                    timed(render_cold, options['repeat'])),
+                'render_cached': summarize(
+                    timed(render_page, options['repeat'])),
+            }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def page_links(posts):
+        """Ссылки, которые строят шапка и карточки одной страницы ленты."""
+        links = [(name, ()) for name in (
+            'posts:index', 'about:author', 'about:tech', 'posts:search',
+            'posts:follow_index', 'posts:post_create', 'password_change',
+            'users:logout',
+        )]
+        for post in posts:
+            links.append(('posts:profile', (post.author.username,)))
+            links.append(('posts:post_detail', (post.pk,)))
+            if post.group_id:
+                links.append(('posts:group_list', (post.group.slug,)))
+        return links
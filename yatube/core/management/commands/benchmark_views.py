@@ -0,0 +1,143 @@
+import json
+import os
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmark import rollback_after, seed_posts, summarize, timed
+
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+# Страницы входа, выхода и регистрации открываем без авторизации,
+# иначе выход разлогинит клиент посреди замеров.
+ANONYMOUS_NAMESPACES = ('users',)
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'views.json')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95, число запросов и размер ответа для всех '
+            'страниц posts, users и about и сравнивает с эталоном.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000,
+                            help='Сколько постов создать.')
+        parser.add_argument('--authors', type=int, default=10)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=30,
+                            help='Сколько раз запрашивать каждую страницу.')
+        parser.add_argument('--warmup', type=int, default=3,
+                            help='Прогревочные запросы без замера.')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                            help='JSON-файл с эталонными замерами.')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Записать замеры как новый эталон.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Допустимый рост времени и размера (доля).')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help='Рост времени меньше этого считается шумом.')
+
+    def handle(self, *args, **options):
+        with rollback_after():
+            authors, groups = seed_posts(
+                options['posts'], options['authors'], options['groups'])
+            author = authors[0]
+            # Сотрудник видит и служебные страницы вроде статистики кеша.
+            author.is_staff = True
+            author.save()
+            values = {
+                'slug': groups[0].slug,
+                'username': author.username,
+                'post_id': author.posts.latest('pk').pk,
+            }
+            author_client = Client()
+            author_client.force_login(author)
+            results = {}
+            for view_name, url in self.urls(values):
+                namespace = view_name.split(':')[0]
+                client = (Client() if namespace in ANONYMOUS_NAMESPACES
+                          else author_client)
+                results[view_name] = self.measure(
+                    client, url, options['repeat'], options['warmup'])
+        report = {
+            'dataset': {key: options[key]
+                        for key in ('posts', 'authors', 'groups')},
+            'views': results,
+        }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            return
+        if os.path.exists(options['baseline']):
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            failures = self.compare(baseline, report, options)
+            if failures:
+                raise CommandError(
+                    'Замедление относительно эталона:\n' + '\n'.join(failures))
+
+    @staticmethod
+    def urls(values):
+        for urlconf in URLCONFS:
+            module = import_module(urlconf)
+            for pattern in module.urlpatterns:
+                view_name = f'{module.app_name}:{pattern.name}'
+                kwargs = {name: values[name]
+                          for name in pattern.pattern.converters}
+                yield view_name, reverse(view_name, kwargs=kwargs)
+
+    @staticmethod
+    def fetch(client, url) -> tuple:
+        """Ответ и его тело; потоковый ответ читается целиком."""
+        response = client.get(url)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def measure(self, client, url, repeat, warmup):
+        with CaptureQueriesContext(connection) as queries:
+            response, body = self.fetch(client, url)
+        for _ in range(warmup):
+            self.fetch(client, url)
+        result = {
+            'url': url,
+            'status': response.status_code,
+            'queries': len(queries),
+            'bytes': len(body),
+        }
+        result.update(summarize(timed(lambda: self.fetch(client, url),
+                                      repeat)))
+        return result
+
+    @staticmethod
+    def compare(baseline, report, options):
+        if baseline.get('dataset') != report['dataset']:
+            raise CommandError('Эталон снят на другом наборе данных: '
+                               f'{baseline.get("dataset")}')
+        limit = 1 + options['threshold']
+        failures = []
+        for view_name, current in report['views'].items():
+            base = baseline['views'].get(view_name)
+            if base is None:
+                continue
+            # Единичный всплеск задевает только хвост, поэтому
+            # замедлением считаем рост и медианы, и p95.
+            if all(current[key] > base[key] * limit
+                   and current[key] - base[key] > options['min_delta_ms']
+                   for key in ('p50_ms', 'p95_ms')):
+                failures.append(
+                    f'{view_name}: p50/p95 {base["p50_ms"]}/'
+                    f'{base["p95_ms"]} -> {current["p50_ms"]}/'
+                    f'{current["p95_ms"]} мс')
+            if current['queries'] > base['queries']:
+                failures.append(f'{view_name}: запросов {base["queries"]} '
+                                f'-> {current["queries"]}')
+            if current['bytes'] > base['bytes'] * limit:
+                failures.append(f'{view_name}: размер {base["bytes"]} -> '
+                                f'{current["bytes"]} байт')
+        return failures
@@ -0,0 +1,43 @@
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.queries import format_finding
+
+
+class Command(BaseCommand):
+    help = ('Сводка медленных и повторяющихся запросов из лога '
+            'QueryInspectorMiddleware.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.QUERY_INSPECTOR_LOG,
+                            help='Файл лога с находками.')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько находок показать.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Очистить лог после отчёта.')
+
+    def handle(self, *args, **options):
+        path = options['log']
+        if not os.path.exists(path):
+            self.stdout.write('Находок нет.')
+            return
+        groups = defaultdict(list)
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                finding = json.loads(line)
+                key = (finding['kind'], finding.get('view'),
+                       finding['shape'])
+                groups[key].append(finding)
+        report = sorted(groups.values(), key=len, reverse=True)
+        for findings in report[:options['top']]:
+            worst = max(findings,
+                        key=lambda item: (item.get('count', 0), item['ms']))
+            self.stdout.write(f'{len(findings)}× {format_finding(worst)}')
+        if options['reset']:
+            open(path, 'w').close()
@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import queue_stats, run_worker
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Размер пула потоков.')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда очередь опустеет.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Показать глубину очереди и задержки.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats(), indent=2))
+            return
+        run_worker(options['threads'], options['poll'], options['once'])
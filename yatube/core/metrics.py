@@ -0,0 +1,95 @@
+"""Замеры одного запроса: SQL, шаблоны, кеш и общее время.
+
+Замеры текущего запроса лежат в contextvar, поэтому код приложения
+может дописывать в них свои счётчики, ничего не зная о middleware.
+Если запрос не попал в выборку, все функции ничего не делают.
+"""
+import contextvars
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template import base as template_base
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.counters = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def percentile(values, percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def current():
+    return _current.get()
+
+
+def incr(name: str, value: int = 1):
+    metrics = _current.get()
+    if metrics is not None and value:
+        metrics.counters[name] = metrics.counters.get(name, 0) + value
+
+
+@contextmanager
+def collect():
+    """Собирает замеры для кода внутри блока."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+def instrument_templates():
+    """Подменяет Template.render, чтобы считать время отрисовки.
+
+    Учитывается только внешний шаблон: вложенные include и карточки
+    постов рисуются внутри него и уже входят в его время.
+    """
+    if getattr(template_base.Template.render, 'instrumented', False):
+        return
+    original = template_base.Template.render
+
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None or metrics.template_depth:
+            return original(self, context)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_depth -= 1
+            metrics.template_time += time.perf_counter() - started
+
+    render.instrumented = True
+    template_base.Template.render = render
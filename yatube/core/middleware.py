@@ -0,0 +1,98 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, queries, routers
+
+logger = logging.getLogger('yatube.perf')
+query_logger = logging.getLogger('yatube.queries')
+
+
+class PerformanceMiddleware:
+    """Замеряет часть запросов и отдаёт итоги в Server-Timing и в лог.
+
+    Доля замеряемых запросов задаётся настройкой PERF_SAMPLE_RATE;
+    при нуле middleware отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', True)
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with metrics.collect() as current:
+            response = self.get_response(request)
+            total = current.elapsed()
+        view = getattr(request.resolver_match, 'view_name', None)
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(
+                current, total)
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_count': current.sql_count,
+            'sql_ms': round(current.sql_time * 1000, 2),
+            'template_ms': round(current.template_time * 1000, 2),
+            **current.counters,
+        }, ensure_ascii=False))
+        return response
+
+    @staticmethod
+    def server_timing_header(current, total) -> str:
+        hits = current.counters.get('cache_hits', 0)
+        misses = current.counters.get('cache_misses', 0)
+        return ', '.join([
+            f'sql;dur={current.sql_time * 1000:.2f};'
+            f'desc="{current.sql_count} queries"',
+            f'tpl;dur={current.template_time * 1000:.2f}',
+            f'cache;desc="hits={hits} misses={misses}"',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+class QueryInspectorMiddleware:
+    """Пишет в лог медленные и повторяющиеся запросы каждого запроса.
+
+    Включается настройкой QUERY_INSPECTOR; сводку по логу собирает
+    команда query_report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(settings, 'QUERY_INSPECTOR', False):
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        with queries.inspect_queries() as inspector:
+            response = self.get_response(request)
+        view = getattr(request.resolver_match, 'view_name', None)
+        for finding in inspector.findings():
+            finding['view'] = view
+            query_logger.warning(json.dumps(finding, ensure_ascii=False))
+        return response
+
+
+class PrimaryStickinessMiddleware:
+    """После запроса с записью читаем из default (см. core/routers.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+                and settings.DATABASE_REPLICAS):
+            routers.pin_to_primary(response)
+        return response
@@ -0,0 +1,76 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """Фоновая задача из очереди core.tasks."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Имя задачи'
+    )
+    payload = models.TextField(
+        default='{}',
+        verbose_name='Аргументы (JSON)'
+    )
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=3,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена в очередь'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало выполнения'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Окончание выполнения'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        indexes = [
+            # Выборка готовых к запуску задач воркером.
+            models.Index(fields=['status', 'run_at'],
+                         name='task_status_run_at_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} [{self.status}]'
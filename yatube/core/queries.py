@@ -0,0 +1,136 @@
+"""Поиск медленных и повторяющихся SQL-запросов.
+
+Инспектор оборачивает выполнение запросов на всех подключениях и для
+каждого запроса запоминает его форму (SQL без значений), время, строку
+кода и строку шаблона, из которых он был выполнен. Одинаковая форма,
+повторённая несколько раз за запрос, обычно означает N+1: забытый
+select_related или счётчик, который считается в цикле шаблона.
+"""
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+IN_LIST_RE = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+RENDER_CODE = Node.render_annotated.__code__
+# Обёртки самих замеров не считаются местом, откуда пришёл запрос.
+SKIP_FILES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('metrics.py', 'queries.py')
+)
+
+
+def query_shape(sql: str) -> str:
+    """Заменяет значения на ? и сворачивает списки IN (?, ?, ...)."""
+    return IN_LIST_RE.sub('(...)', LITERAL_RE.sub('?', sql))
+
+
+def caller_location():
+    """Строка кода проекта и строка шаблона, откуда выполнен запрос."""
+    source = template = None
+    frame = sys._getframe(2)
+    while frame is not None and (source is None or template is None):
+        code = frame.f_code
+        if template is None and code is RENDER_CODE:
+            node = frame.f_locals['self']
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                name = origin.template_name or origin.name
+                template = f'{name}:{token.lineno}'
+        elif (source is None
+              and code.co_filename.startswith(settings.BASE_DIR)
+              and code.co_filename not in SKIP_FILES):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            source = f'{path}:{frame.f_lineno}'
+        frame = frame.f_back
+    return source, template
+
+
+class QueryInspector:
+    """Обёртка для connection.execute_wrapper, копящая сведения о запросах."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            source, template = caller_location()
+            self.queries.append({
+                'sql': sql,
+                'shape': query_shape(sql),
+                'ms': round(duration, 3),
+                'source': source,
+                'template': template,
+            })
+
+    def slow(self, threshold_ms: float):
+        return [query for query in self.queries
+                if query['ms'] >= threshold_ms]
+
+    def duplicates(self, threshold: int):
+        """Формы запросов, выполненные не меньше threshold раз."""
+        counts = Counter(query['shape'] for query in self.queries)
+        found = []
+        for shape, count in counts.items():
+            if count < threshold:
+                continue
+            first = next(query for query in self.queries
+                         if query['shape'] == shape)
+            found.append(dict(first, count=count))
+        return found
+
+    def findings(self, slow_ms=None, duplicate_threshold=None):
+        if slow_ms is None:
+            slow_ms = settings.SLOW_QUERY_MS
+        if duplicate_threshold is None:
+            duplicate_threshold = settings.DUPLICATE_QUERY_THRESHOLD
+        return (
+            [dict(query, kind='slow') for query in self.slow(slow_ms)]
+            + [dict(query, kind='duplicate')
+               for query in self.duplicates(duplicate_threshold)]
+        )
+
+
+@contextmanager
+def inspect_queries():
+    inspector = QueryInspector()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+def format_finding(finding) -> str:
+    where = ', '.join(filter(None, [
+        finding.get('view'), finding['source'], finding['template']]))
+    if finding['kind'] == 'slow':
+        head = f'медленный запрос {finding["ms"]} мс'
+    else:
+        head = f'запрос повторён {finding["count"]} раз'
+    return f'{head} ({where}): {finding["shape"]}'
+
+
+@contextmanager
+def assert_no_query_problems(slow_ms=None, duplicate_threshold=None):
+    """Проверка для тестов: падает на медленных и повторных запросах.
+
+    with assert_no_query_problems():
+        self.client.get(reverse('posts:index'))
+    """
+    with inspect_queries() as inspector:
+        yield inspector
+    findings = inspector.findings(slow_ms, duplicate_threshold)
+    if findings:
+        raise AssertionError('\n'.join(map(format_finding, findings)))
@@ -0,0 +1,32 @@
+"""Запоминание результатов reverse() для ссылок в карточках и меню.
+
+reverse() на каждый вызов перебирает варианты шаблона URL и собирает
+строку заново, а страница ленты строит десятки одинаковых по виду
+ссылок. Результат зависит только от имени маршрута, аргументов,
+префикса скрипта и URLconf, поэтому его можно запомнить.
+"""
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+# Ссылки на посты у каждого поста свои: держим самые частые.
+CACHE_SIZE = 10000
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _reverse(viewname, args, prefix, urlconf):
+    return reverse(viewname, urlconf=urlconf, args=args)
+
+
+def cached_reverse(viewname: str, *args) -> str:
+    """reverse(viewname, args=args) с запоминанием результата."""
+    return _reverse(viewname, tuple(str(arg) for arg in args),
+                    get_script_prefix(), get_urlconf())
+
+
+@receiver(setting_changed)
+def clear_cache(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse.cache_clear()
@@ -0,0 +1,88 @@
+"""Чтение лент с реплик базы данных.
+
+Запись всегда идёт в default. Читают с реплики только представления,
+помеченные декоратором @use_replica, и только пока пользователь
+недавно ничего не записывал: после POST middleware ставит куку, и
+несколько секунд (REPLICA_STICKY_SECONDS) все его чтения идут в
+default (представления, которые пишут на GET, ставят её через
+@writes_on_get), чтобы он сразу видел свои изменения, даже если реплика
+отстаёт. Реплики перечислены в настройке DATABASE_REPLICAS; при пустом
+списке всё читается из default.
+"""
+import contextvars
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_until'
+
+_read_alias = contextvars.ContextVar('replica_alias', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # В репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+def reading_replica() -> bool:
+    """Читает ли текущее представление с реплики."""
+    return _read_alias.get() is not None
+
+
+def is_pinned(request) -> bool:
+    """Писал ли пользователь недавно (тогда читаем из default)."""
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_to_primary(response):
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(STICKY_COOKIE, str(time.time() + seconds),
+                        max_age=seconds, httponly=True)
+
+
+def writes_on_get(view_func):
+    """Ставит куку чтения из default представлению, пишущему на GET.
+
+    Middleware ставит её только после POST и других небезопасных
+    методов, а ссылки вроде «Подписаться» пишут в базу на GET.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if settings.DATABASE_REPLICAS:
+            pin_to_primary(response)
+        return response
+    return wrapper
+
+
+def use_replica(view_func):
+    """Выполняет представление, читая данные с одной из реплик."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned(request):
+            return view_func(request, *args, **kwargs)
+        # Сессия и пользователь читаются из default, как и в middleware.
+        request.user.is_authenticated
+        token = _read_alias.set(random.choice(replicas))
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
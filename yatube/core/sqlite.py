@@ -0,0 +1,19 @@
+"""Настройка подключений SQLite через PRAGMA.
+
+Обработчик сигнала connection_created выполняет PRAGMA из настройки
+SQLITE_PRAGMAS для каждого нового подключения; профиль production
+(DB_PROFILE=production) берёт их из SQLITE_PRODUCTION_PRAGMAS.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(connection, pragmas):
+    # Напрямую через sqlite3, мимо обёрток: PRAGMA не должны попадать
+    # в замеры SQL-запросов.
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,31 @@
+"""Хранилище собранной статики.
+
+Поверх CompressedManifestStaticFilesStorage из WhiteNoise (хеш
+содержимого в именах файлов, сжатые копии .gz и .br) перед хешированием
+вычищает из файлов PURGE_CSS правила, не нужные нашим шаблонам.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .css import purge, source_tokens
+
+
+class PurgedCompressedManifestStorage(CompressedManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            tokens = source_tokens(settings.PURGE_CSS_SOURCES)
+            paths = dict(paths)
+            for name in settings.PURGE_CSS:
+                if name in paths:
+                    self.purge(name, tokens)
+                    # Хеш считается по исходному файлу из paths, поэтому
+                    # подставляем вычищенную копию из собранной статики.
+                    paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def purge(self, name, tokens):
+        with self.open(name) as file:
+            css = file.read().decode('utf-8')
+        self.delete(name)
+        self.save(name, ContentFile(purge(css, tokens).encode('utf-8')))
@@ -0,0 +1,191 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача — обычная функция, помеченная декоратором @task. Вызов
+func.enqueue(args=[...]) сохраняет строку Task, а воркер (команда
+run_tasks) забирает готовые задачи и выполняет их в пуле потоков,
+повторяя упавшие с растущей задержкой. Ключ идемпотентности не даёт
+поставить одну и ту же работу дважды.
+
+С настройкой TASKS_EAGER задачи выполняются сразу при постановке:
+так работают разработка без воркера и тесты.
+"""
+import json
+import logging
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger('yatube.tasks')
+registry = {}
+
+
+def task(name=None, max_attempts=3, retry_delay=5):
+    """Регистрирует функцию как задачу и добавляет ей метод enqueue.
+
+    retry_delay — задержка перед первым повтором в секундах,
+    каждый следующий повтор ждёт вдвое дольше.
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.enqueue = partial(enqueue, func)
+        registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, args=(), kwargs=None, key=None, delay=0):
+    """Ставит задачу в очередь; с тем же ключом возвращает уже стоящую."""
+    kwargs = kwargs or {}
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return None
+    metrics.incr('tasks_enqueued')
+    values = {
+        'name': func.task_name,
+        'payload': json.dumps({'args': list(args), 'kwargs': kwargs}),
+        'max_attempts': func.max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Task.objects.create(**values)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(idempotency_key=key, **values)
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=key)
+
+
+def requeue_stale(now):
+    """Возвращает в очередь задачи воркеров, упавших посреди работы."""
+    timeout = timedelta(seconds=settings.TASKS_VISIBILITY_TIMEOUT)
+    Task.objects.filter(
+        status=Task.RUNNING, started_at__lt=now - timeout,
+    ).update(status=Task.PENDING, run_at=now)
+
+
+def claim(limit: int):
+    """Забирает до limit готовых задач и возвращает их id.
+
+    Каждая задача забирается условным UPDATE, поэтому несколько воркеров
+    не возьмут одну задачу дважды.
+    """
+    now = timezone.now()
+    requeue_stale(now)
+    ready = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now,
+    ).order_by('run_at').values_list('pk', flat=True)[:limit]
+    return [
+        pk for pk in ready
+        if Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, started_at=now,
+            attempts=F('attempts') + 1)
+    ]
+
+
+def execute(task_id) -> bool:
+    """Выполняет забранную задачу и записывает результат."""
+    job = Task.objects.get(pk=task_id)
+    func = registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        payload = json.loads(job.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        retry_or_fail(job, func, traceback.format_exc())
+        return False
+    Task.objects.filter(pk=job.pk).update(
+        status=Task.DONE, finished_at=timezone.now(), last_error='')
+    return True
+
+
+def retry_or_fail(job, func, error: str):
+    now = timezone.now()
+    if func is not None and job.attempts < job.max_attempts:
+        delay = func.retry_delay * 2 ** (job.attempts - 1)
+        Task.objects.filter(pk=job.pk).update(
+            status=Task.PENDING, last_error=error,
+            run_at=now + timedelta(seconds=delay))
+        logger.warning('Задача %s #%s упала, повтор через %s с',
+                       job.name, job.pk, delay)
+        return
+    Task.objects.filter(pk=job.pk).update(
+        status=Task.FAILED, last_error=error, finished_at=now)
+    logger.error('Задача %s #%s не выполнена: %s', job.name, job.pk, error)
+
+
+def execute_in_thread(task_id) -> bool:
+    try:
+        return execute(task_id)
+    finally:
+        # У каждого потока пула своё подключение к базе.
+        connection.close()
+
+
+def run_pending(limit: int = 100) -> int:
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    claimed = claim(limit)
+    for task_id in claimed:
+        execute(task_id)
+    return len(claimed)
+
+
+def run_worker(threads: int = 4, poll_interval: float = 1.0,
+               once: bool = False):
+    """Цикл воркера: держит занятыми threads потоков пула.
+
+    С once=True выходит, когда готовых задач не осталось.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        running = set()
+        while True:
+            free = threads - len(running)
+            if free:
+                running |= {executor.submit(execute_in_thread, task_id)
+                            for task_id in claim(free)}
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            _, running = wait(running, timeout=poll_interval,
+                              return_when=FIRST_COMPLETED)
+
+
+def queue_stats(sample: int = 1000) -> dict:
+    """Глубина очереди и задержки последних выполненных задач, мс."""
+    now = timezone.now()
+    depth = dict(Task.objects.order_by().values_list('status').annotate(
+        total=Count('pk')))
+    oldest = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now,
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    recent = Task.objects.filter(status=Task.DONE).order_by(
+        '-finished_at').values_list(
+        'created_at', 'started_at', 'finished_at')[:sample]
+    waits = [(started - created).total_seconds() * 1000
+             for created, started, _ in recent]
+    runs = [(finished - started).total_seconds() * 1000
+            for _, started, finished in recent]
+    return {
+        'depth': {status: depth.get(status, 0)
+                  for status, _ in Task.STATUSES},
+        'oldest_ready_age_s': round(
+            (now - oldest).total_seconds(), 3) if oldest else 0,
+        'wait_p50_ms': round(metrics.percentile(waits, 50), 3),
+        'wait_p95_ms': round(metrics.percentile(waits, 95), 3),
+        'run_p50_ms': round(metrics.percentile(runs, 50), 3),
+        'run_p95_ms': round(metrics.percentile(runs, 95), 3),
+    }
@@ -0,0 +1,11 @@
+from django import template
+
+from ..reverse import cached_reverse
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    """Как {% url %} с позиционными аргументами, но с запоминанием."""
+    return cached_reverse(viewname, *args)
@@ -0,0 +1,35 @@
+import asyncio
+from http import HTTPStatus
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from yatube.asgi import application
+
+
+class AsgiApplicationTest(SimpleTestCase):
+    def request(self, path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': 'GET',
+            'path': path,
+            'query_string': b'', 'root_path': '', 'scheme': 'http',
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+        }
+        asyncio.run(application(scope, receive, send))
+        return messages
+
+    def test_asgi_serves_pages(self):
+        """ASGI-приложение отдаёт страницы из пула потоков."""
+        start, *body = self.request(reverse('about:author'))
+        self.assertEqual(start['status'], HTTPStatus.OK)
+        content = b''.join(message.get('body', b'') for message in body)
+        self.assertIn('Об авторе'.encode(), content)
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_tasks_cache
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FILE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': '/tmp/yatube-test-cache'}}
+
+
+class TasksCacheCheckTest(SimpleTestCase):
+    def test_worker_needs_shared_cache(self):
+        """Без TASKS_EAGER кеш в памяти процесса — ошибка настройки."""
+        with override_settings(TASKS_EAGER=False, CACHES=LOCMEM):
+            errors = check_tasks_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        with override_settings(TASKS_EAGER=False, CACHES=FILE):
+            self.assertEqual(check_tasks_cache(None), [])
+        with override_settings(TASKS_EAGER=True, CACHES=LOCMEM):
+            self.assertEqual(check_tasks_cache(None), [])
@@ -0,0 +1,22 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkViewsTest(TestCase):
+    def test_benchmark_views_runs(self):
+        """Замер обходит все страницы, включая потоковую выгрузку."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out = StringIO()
+            call_command(
+                'benchmark_views', posts=20, repeat=1, warmup=0,
+                baseline=os.path.join(tmp_dir, 'views.json'), stdout=out)
+        views = json.loads(out.getvalue())['views']
+        export = views['posts:profile_export']
+        self.assertEqual(export['status'], 200)
+        self.assertGreater(export['bytes'], 0)
+        self.assertEqual(views['posts:index']['status'], 200)
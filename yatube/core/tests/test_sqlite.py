@@ -0,0 +1,19 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class SQLitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234,
+                                       'synchronous': 'normal'})
+    def test_new_connection_gets_pragmas(self):
+        """Новое подключение выполняет PRAGMA из SQLITE_PRAGMAS."""
+        other = connection.copy()
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout')
+                self.assertEqual(cursor.fetchone()[0], 1234)
+                cursor.execute('PRAGMA synchronous')
+                # 1 — NORMAL
+                self.assertEqual(cursor.fetchone()[0], 1)
+        finally:
+            other.close()
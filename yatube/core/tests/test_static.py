@@ -0,0 +1,56 @@
+import re
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+
+class StaticAssetsTest(TestCase):
+    # Сколько байт передаётся при первой загрузке главной страницы
+    COLD_LOAD_BUDGET = 20 * 1024
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE='core.storage.PurgedCompressedManifestStorage',
+            WHITENOISE_USE_FINDERS=False,
+            WHITENOISE_AUTOREFRESH=False,
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # В кеше могут лежать страницы со ссылками на несобранную статику.
+        cache.clear()
+
+    def test_cold_page_load_bytes(self):
+        """Страница со всей статикой укладывается в бюджет по байтам."""
+        client = Client(HTTP_ACCEPT_ENCODING='br, gzip')
+        page = client.get(reverse('posts:index'))
+        total = len(page.content)
+        assets = re.findall(r'(?:href|src)="(/static/[^"]+)"',
+                            page.content.decode())
+        self.assertTrue(assets)
+        for url in assets:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('immutable', response['Cache-Control'])
+                total += len(b''.join(response.streaming_content))
+                if url.endswith('.css'):
+                    self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertLess(total, self.COLD_LOAD_BUDGET)
@@ -0,0 +1,193 @@
+"""Кеширование карточек постов и целых страниц лент.
+
+Ключ карточки собирается из id поста, дат публикации и изменения и
+штампов версий поста, автора и группы. Штампы меняются сигналами при
+сохранении и удалении моделей, поэтому устаревшие карточки просто
+перестают читаться и вытесняются кешем сами.
+
+Страницы лент для анонимов кешируются по областям (вся лента, группа,
+автор): у каждой области свой номер поколения, и запись поста увеличивает
+только поколения затронутых областей.
+"""
+import hashlib
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.utils.cache import patch_vary_headers
+
+from core import metrics
+
+CARD_TEMPLATE = 'includes/article.html'
+STATS_KEYS = {
+    'hits': 'post_card:stats:hits',
+    'misses': 'post_card:stats:misses',
+}
+
+
+def stamp_key(kind: str, pk) -> str:
+    return f'post_card:stamp:{kind}:{pk}'
+
+
+def bump_stamp(kind: str, pk):
+    """Делает недействительными все карточки, зависящие от объекта."""
+    cache.set(stamp_key(kind, pk), uuid4().hex, None)
+
+
+def get_stamps(keys):
+    stamps = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing, None)
+        stamps.update(missing)
+    return stamps
+
+
+def card_variant(request) -> str:
+    """На странице группы ссылка на группу в карточке не выводится."""
+    match = getattr(request, 'resolver_match', None)
+    if match and match.view_name == 'posts:group_list':
+        return 'in_group'
+    return 'default'
+
+
+def card_keys(posts, variant: str) -> dict:
+    # updated_at в ключе: читатель с отстающей реплики видит старую
+    # версию поста и кладёт её под старым ключом, а не под новым.
+    stamp_keys = set()
+    for post in posts:
+        stamp_keys.add(stamp_key('post', post.pk))
+        stamp_keys.add(stamp_key('user', post.author_id))
+        stamp_keys.add(stamp_key('group', post.group_id))
+    stamps = get_stamps(list(stamp_keys))
+    return {
+        post.pk: 'post_card:{}:{}:{}:{}:{}:{}:{}'.format(
+            variant,
+            post.pk,
+            post.pub_date.timestamp(),
+            post.updated_at.timestamp(),
+            stamps[stamp_key('post', post.pk)],
+            stamps[stamp_key('user', post.author_id)],
+            stamps[stamp_key('group', post.group_id)],
+        )
+        for post in posts
+    }
+
+
+def render_cards(posts, request) -> dict:
+    """Возвращает {id поста: html карточки}, дорисовывая промахи кеша."""
+    posts = list(posts)
+    if not posts:
+        return {}
+    keys = card_keys(posts, card_variant(request))
+    cached = cache.get_many(list(keys.values()))
+    cards = {}
+    missed = {}
+    template = get_template(CARD_TEMPLATE)
+    for post in posts:
+        key = keys[post.pk]
+        if key in cached:
+            cards[post.pk] = cached[key]
+            continue
+        cards[post.pk] = missed[key] = template.render(
+            {'post': post, 'request': request})
+    if missed:
+        cache.set_many(missed, settings.POST_CARD_CACHE_TIMEOUT)
+    record_stats(hits=len(posts) - len(missed), misses=len(missed))
+    return cards
+
+
+def record_stats(hits: int, misses: int):
+    metrics.incr('cache_hits', hits)
+    metrics.incr('cache_misses', misses)
+    for name, value in (('hits', hits), ('misses', misses)):
+        if not value:
+            continue
+        key = STATS_KEYS[name]
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            # Счётчик вытеснили между add и incr.
+            cache.set(key, value, None)
+
+
+def get_stats() -> dict:
+    values = cache.get_many(list(STATS_KEYS.values()))
+    return {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def reset_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+def index_scope(request, *args, **kwargs) -> str:
+    return 'index'
+
+
+def group_scope(request, slug) -> str:
+    return f'group:{slug}'
+
+
+def author_scope(request, username) -> str:
+    return f'author:{username}'
+
+
+def generation_key(scope: str) -> str:
+    return f'page_cache:generation:{scope}'
+
+
+def bump_generation(*scopes):
+    """Сбрасывает кеш страниц перечисленных областей."""
+    cache.set_many({generation_key(scope): uuid4().hex for scope in scopes},
+                   None)
+
+
+def page_key(scope: str, request):
+    generation = get_stamps([generation_key(scope)])[generation_key(scope)]
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page_cache:{scope}:{generation}:{path}'
+
+
+def is_cacheable(request, response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def cache_anonymous_page(get_scope):
+    """Кеширует страницу для анонимных пользователей.
+
+    get_scope(request, **kwargs) возвращает имя области страницы.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+            key = page_key(get_scope(request, *args, **kwargs), request)
+            cached = cache.get(key)
+            metrics.incr('cache_hits' if cached is not None
+                         else 'cache_misses')
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view_func(request, *args, **kwargs)
+                if is_cacheable(request, response):
+                    cache.set(
+                        key,
+                        (response.content, response['Content-Type']),
+                        settings.PAGE_CACHE_TIMEOUT,
+                    )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
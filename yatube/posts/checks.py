@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core import checks
+
+from core.checks import cache_is_shared
+
+
+@checks.register(checks.Tags.caches)
+def check_count_cache(app_configs, **kwargs):
+    """Счётчик режима 'estimated' должен быть общим для всех процессов."""
+    if settings.POST_COUNT_MODE != 'estimated' or cache_is_shared():
+        return []
+    return [checks.Error(
+        "POST_COUNT_MODE = 'estimated' хранит счётчик постов в кеше, а кеш "
+        'у каждого процесса свой: пересчитанное воркером число не увидит '
+        'ни один веб-процесс.',
+        hint='Укажите общий кеш в CACHE_BACKEND и CACHE_LOCATION или '
+             "используйте POST_COUNT_MODE = 'exact'.",
+        id='posts.E001',
+    )]
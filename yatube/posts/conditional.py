@@ -0,0 +1,111 @@
+"""Валидатор ETag для условных GET-запросов.
+
+Состояние ленты описывается временем последнего изменения поста в ней,
+числом постов и поколением кеша страниц этой области: поколение меняется
+при любой записи, в том числе при удалении постов. Всё это считается
+до отрисовки шаблона, и на совпавший ETag сразу отдаётся 304.
+
+Last-Modified не отдаётся: одна дата не отражает удаление постов,
+переименование автора или группы и смену вошедшего пользователя, и
+клиент с одним If-Modified-Since получал бы устаревшую страницу.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+from django.utils.cache import patch_vary_headers
+
+from .cache import generation_key, get_stamps, stamp_key
+from .models import Group, Post, User
+
+STATE_ATTR = '_conditional_state'
+
+
+def feed_state(scope, posts, count=None):
+    latest = posts.aggregate(latest=Max('updated_at'))['latest']
+    return latest, [generation_key(scope)], count
+
+
+def index_state(request):
+    return feed_state('index', Post.objects.all())
+
+
+def group_state(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'pk', 'posts_count').first()
+    if group is None:
+        return None
+    return feed_state(f'group:{slug}',
+                      Post.objects.filter(group_id=group['pk']),
+                      group['posts_count'])
+
+
+def author_state(request, username):
+    author = User.objects.filter(username=username).values(
+        'pk', 'post_stats__posts_count').first()
+    if author is None:
+        return None
+    return feed_state(f'author:{username}',
+                      Post.objects.filter(author_id=author['pk']),
+                      author['post_stats__posts_count'])
+
+
+def post_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'updated_at', 'author_id', 'group_id',
+        'author__post_stats__posts_count').first()
+    if post is None:
+        return None
+    # Карточка поста зависит и от автора с группой, их версии
+    # меняются сигналами вместе с кешем карточек. Штамп самого поста
+    # меняет и задача make_thumbnails, не трогая updated_at.
+    return (
+        post['updated_at'],
+        [stamp_key('post', post_id),
+         stamp_key('user', post['author_id']),
+         stamp_key('group', post['group_id'])],
+        post['author__post_stats__posts_count'],
+    )
+
+
+def get_state(state_func, request, *args, **kwargs):
+    if not hasattr(request, STATE_ATTR):
+        setattr(request, STATE_ATTR,
+                state_func(request, *args, **kwargs))
+    return getattr(request, STATE_ATTR)
+
+
+def conditional_page(state_func):
+    """Отвечает 304, если страница не менялась с прошлого запроса.
+
+    state_func(request, **kwargs) возвращает кортеж
+    (время последнего изменения, ключи штампов в кеше, число постов)
+    или None, если объекта нет.
+    """
+    def etag_func(request, *args, **kwargs):
+        state = get_state(state_func, request, *args, **kwargs)
+        if state is None:
+            return None
+        latest, keys, count = state
+        if request.user.is_authenticated:
+            # От подписок зависят кнопки «Подписаться» на странице.
+            keys = [*keys, stamp_key('follows', request.user.pk)]
+        stamps = get_stamps(keys)
+        raw = ':'.join(map(str, [
+            latest, count, request.user.pk, request.get_full_path(),
+            *(stamps[key] for key in keys),
+        ]))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Шапка страницы зависит от вошедшего пользователя.
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,73 @@
+"""Оценка числа постов для паджинатора без COUNT(*) на каждый запрос.
+
+В режиме POST_COUNT_MODE = 'estimated' число строк таблицы берётся из
+кеша, а фоновая задача refresh_table_count раз в COUNT_REFRESH_SECONDS
+пересчитывает его точно. Пока кеш пуст, используется оценка
+планировщика (sqlite_stat1 после ANALYZE, reltuples в PostgreSQL).
+Таблицы меньше EXACT_COUNT_THRESHOLD строк считаются точно: там
+COUNT(*) дёшев, а номер последней страницы должен быть верным.
+
+Счётчик пишет воркер задач, а читают веб-процессы, поэтому режим
+требует общего для процессов кеша (проверка posts.E001).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+
+def count_key(model) -> str:
+    return f'table_count:{model._meta.db_table}'
+
+
+def store_count(model, count: int):
+    cache.set(count_key(model), (count, time.time()), None)
+
+
+def planner_estimate(model):
+    """Число строк по статистике планировщика или None, если её нет."""
+    table = model._meta.db_table
+    connection = connections[model.objects.all().db]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                rows = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+                return max(rows) if rows else None
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class '
+                    'WHERE oid = to_regclass(%s)', [table])
+                row = cursor.fetchone()
+                # -1 — таблицу ещё ни разу не анализировали.
+                return int(row[0]) if row and row[0] >= 0 else None
+    except DatabaseError:
+        # Например, sqlite_stat1 нет, пока не выполнялся ANALYZE.
+        return None
+    return None
+
+
+def estimated_count(model):
+    """Примерное число строк таблицы или None, если нужен точный подсчёт.
+
+    Устаревший счётчик отдаётся как есть, а пересчёт ставится в очередь
+    не чаще раза за COUNT_REFRESH_SECONDS.
+    """
+    if settings.POST_COUNT_MODE != 'estimated':
+        return None
+    from .tasks import refresh_table_count
+
+    key = count_key(model)
+    cached = cache.get(key)
+    if (cached is None
+            or time.time() - cached[1] > settings.COUNT_REFRESH_SECONDS):
+        if cache.add(f'{key}:refreshing', True,
+                     settings.COUNT_REFRESH_SECONDS):
+            refresh_table_count.enqueue(args=[model._meta.label])
+        cached = cache.get(key) or (planner_estimate(model), 0)
+    count = cached[0]
+    if count is None or count < settings.EXACT_COUNT_THRESHOLD:
+        return None
+    return count
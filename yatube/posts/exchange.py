@@ -0,0 +1,94 @@
+"""Построчная выгрузка и загрузка постов в форматах JSONL и CSV."""
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+# image — имя файла в хранилище MEDIA; сами файлы переносятся отдельно.
+FIELDS = ('id', 'text', 'pub_date', 'updated_at', 'author', 'group',
+          'image')
+COLUMNS = ('pk', 'text', 'pub_date', 'updated_at',
+           'author__username', 'group__slug', 'image')
+
+
+def detect_format(path: str, default: str = 'jsonl') -> str:
+    name = path[:-3] if path.endswith('.gz') else path
+    for fmt in FORMATS:
+        if name.endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def open_stream(path: str, mode: str):
+    """Открывает файл как текстовый поток; '-' — stdin/stdout, .gz — gzip."""
+    if path == '-':
+        return io.TextIOWrapper(
+            (sys.stdin if 'r' in mode else sys.stdout).buffer,
+            encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def export_rows(queryset, chunk_size: int):
+    """Постов в памяти не больше chunk_size: строки читаются курсором."""
+    rows = queryset.order_by('pk').values_list(*COLUMNS).iterator(
+        chunk_size=chunk_size)
+    for row in rows:
+        row = dict(zip(FIELDS, row))
+        # Даты с микросекундами: по ним сортируется лента.
+        row['pub_date'] = row['pub_date'].isoformat()
+        row['updated_at'] = row['updated_at'].isoformat()
+        yield row
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False)
+        yield '\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer, который просто возвращает строку."""
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def serialize(rows, fmt: str):
+    return jsonl_lines(rows) if fmt == 'jsonl' else csv_lines(rows)
+
+
+def read_rows(stream, fmt: str):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def preserved_timestamps():
+    """Отключает auto_now у дат поста, чтобы сохранить даты из выгрузки."""
+    fields = [Post._meta.get_field('pub_date'),
+              Post._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -5,12 +5,14 @@ from django.forms import ModelForm
 class PostForm(ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group',)
+        fields = ('text', 'group', 'image',)
         labels = {
             'text': 'Текст поста',
             'group': 'Сообщество',
+            'image': 'Картинка',
         }
         help_text = {
             'text': 'Заполните текст поста',
             'group': 'Выберите сообщество',
+            'image': 'Добавьте картинку к посту',
         }
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.exchange import (FORMATS, detect_format, export_rows,
+                            open_stream, serialize)
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL/CSV, читая базу порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл выгрузки, '-' для stdout.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Формат; по умолчанию по расширению файла.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Сколько строк читать из базы за раз.')
+        parser.add_argument('--author', help='Выгрузить посты автора.')
+        parser.add_argument('--group', help='Выгрузить посты группы (slug).')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        posts = Post.objects.all()
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+        if options['group']:
+            posts = posts.filter(group__slug=options['group'])
+        exported = 0
+        started = time.perf_counter()
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        with open_stream(options['path'], 'w') as stream:
+            for chunk in serialize(
+                    counted(export_rows(posts, options['chunk_size'])), fmt):
+                stream.write(chunk)
+        elapsed = time.perf_counter() - started
+        rate = exported / elapsed if elapsed else 0
+        # При выгрузке в stdout отчёт уходит в stderr, чтобы не испортить
+        # данные.
+        self.stderr.write(f'Выгружено постов: {exported} за {elapsed:.1f} с '
+                          f'({rate:.0f} в секунду)')
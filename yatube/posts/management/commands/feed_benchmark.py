@@ -0,0 +1,64 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import rollback_after, seed_posts, summarize, timed
+from posts.models import Post
+from posts.utils import CursorPaginator, keyset_filter
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу N постами и записывает планы запросов '
+            'и задержки для лент index, group_list и profile.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000,
+                            help='Сколько постов создать.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз запрашивать каждую страницу.')
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+        parser.add_argument('--keep', action='store_true',
+                            help='Не откатывать созданные данные.')
+
+    def handle(self, *args, **options):
+        with rollback_after(keep=options['keep']):
+            authors, groups = seed_posts(options['posts'])
+            report = {
+                'posts': options['posts'],
+                'views': self.measure(authors[0], groups[0],
+                                      options['repeat']),
+            }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def measure(self, author, group, repeat):
+        feeds = {
+            'posts:index': ({}, Post.objects.all()),
+            'posts:group_list': ({'slug': group.slug}, group.posts.all()),
+            'posts:profile': ({'username': author.username},
+                              author.posts.all()),
+        }
+        # Анонимам страницы отдаются из кеша, поэтому замеряем отрисовку
+        # под авторизованным пользователем.
+        client = Client()
+        client.force_login(author)
+        results = {}
+        for view_name, (kwargs, queryset) in feeds.items():
+            url = reverse(view_name, kwargs=kwargs)
+            object_list = CursorPaginator(
+                queryset, settings.POST_PER_PAGE).object_list
+            last = object_list[settings.POST_PER_PAGE - 1]
+            deep = object_list.filter(keyset_filter(last.pub_date, last.pk))
+            results[view_name] = {
+                'url': url,
+                'plan': object_list[:settings.POST_PER_PAGE].explain(),
+                'cursor_plan': deep[:settings.POST_PER_PAGE].explain(),
+                'latency': summarize(timed(lambda: client.get(url), repeat)),
+            }
+        return results
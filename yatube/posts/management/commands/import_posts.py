@@ -0,0 +1,139 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.cache import bump_generation
+from posts.exchange import (FORMATS, detect_format, open_stream,
+                            preserved_timestamps, read_rows)
+from posts.models import Group, Post, User
+from posts.search import get_search_backend
+from posts.signals import (change_author_count, change_group_count,
+                           queue_thumbnails)
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из JSONL/CSV-выгрузки пачками bulk_create. '
+            'Авторы и группы ищутся по username и slug.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл выгрузки, '-' для stdin.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Формат; по умолчанию по расширению файла.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Постов в одной транзакции.')
+        parser.add_argument('--keep-ids', action='store_true',
+                            help='Сохранить id постов из выгрузки.')
+        parser.add_argument('--report-every', type=int, default=100000,
+                            help='Как часто выводить прогресс (в строках).')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.keep_ids = options['keep_ids']
+        self.now = timezone.now()
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.image_pks = []
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last']
+        imported = skipped = 0
+        started = time.perf_counter()
+        batch = []
+        with open_stream(options['path'], 'r') as stream, \
+                preserved_timestamps():
+            for row in read_rows(stream, fmt):
+                post = self.build_post(row)
+                if post is None:
+                    skipped += 1
+                    continue
+                batch.append(post)
+                if len(batch) >= options['batch_size']:
+                    flushed = self.flush(batch)
+                    batch = []
+                    every = options['report_every']
+                    if (imported + flushed) // every > imported // every:
+                        self.report(imported + flushed, started,
+                                    self.stderr)
+                    imported += flushed
+            imported += self.flush(batch)
+        self.refresh_derived(last_pk)
+        self.report(imported, started, self.stdout, skipped)
+
+    def build_post(self, row):
+        author_id = self.authors.get(row.get('author'))
+        group_slug = row.get('group') or None
+        group_id = self.groups.get(group_slug)
+        if author_id is None or group_slug and group_id is None:
+            return None
+        pub_date = parse_datetime(row.get('pub_date') or '') or self.now
+        post = Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            updated_at=parse_datetime(row.get('updated_at') or '')
+            or pub_date,
+            image=row.get('image') or '',
+        )
+        if self.keep_ids and row.get('id'):
+            post.pk = int(row['id'])
+            if post.image:
+                self.image_pks.append(post.pk)
+        return post
+
+    def flush(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+            # bulk_create не вызывает сигналы: счётчики двигаем сразу
+            # на всю пачку.
+            for author_id, total in Counter(
+                    post.author_id for post in batch).items():
+                change_author_count(author_id, total)
+            for group_id, total in Counter(
+                    post.group_id for post in batch).items():
+                change_group_count(group_id, total)
+        self.touched_authors.update(post.author_id for post in batch)
+        self.touched_groups.update(post.group_id for post in batch)
+        return len(batch)
+
+    def refresh_derived(self, last_pk):
+        get_search_backend().rebuild(
+            since_pk=None if self.keep_ids else last_pk)
+        self.queue_thumbnails(last_pk)
+        usernames = {pk: name for name, pk in self.authors.items()}
+        slugs = {pk: slug for slug, pk in self.groups.items()}
+        bump_generation(
+            'index',
+            *(f'author:{usernames[pk]}' for pk in self.touched_authors),
+            *(f'group:{slugs[pk]}' for pk in self.touched_groups
+              if pk is not None),
+        )
+
+    def queue_thumbnails(self, last_pk):
+        """Миниатюры загруженных картинок: bulk_create обходит сигналы."""
+        posts = Post.objects.exclude(image='')
+        if self.keep_ids:
+            if not self.image_pks:
+                return
+            posts = posts.filter(pk__range=(min(self.image_pks),
+                                            max(self.image_pks)))
+        elif last_pk is not None:
+            posts = posts.filter(pk__gt=last_pk)
+        for pk, image in posts.values_list('pk', 'image').iterator():
+            queue_thumbnails(pk, image)
+
+    def report(self, imported, started, stream, skipped=None):
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else 0
+        message = (f'Загружено постов: {imported} за {elapsed:.1f} с '
+                   f'({rate:.0f} в секунду)')
+        if skipped is not None:
+            message += f', пропущено строк: {skipped}'
+        stream.write(message)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import AuthorStats, Follow, Group, Post
+
+
+def count_of(queryset, field: str):
+    """Подзапрос: число строк queryset, где field равно pk внешней строки."""
+    counts = queryset.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов и подписчиков у авторов '
+            'и групп.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            groups = Group.objects.update(
+                posts_count=count_of(Post.objects.all(), 'group'),
+                followers_count=count_of(Follow.objects.all(), 'group'),
+            )
+            # Строки счётчиков нужны всем, у кого есть посты или подписчики.
+            author_ids = set(Post.objects.order_by().values_list(
+                'author', flat=True).distinct())
+            author_ids.update(Follow.objects.filter(
+                author__isnull=False).order_by().values_list(
+                'author', flat=True).distinct())
+            AuthorStats.objects.bulk_create(
+                [AuthorStats(author_id=author_id) for author_id in author_ids],
+                ignore_conflicts=True,
+            )
+            authors = AuthorStats.objects.update(
+                posts_count=count_of(Post.objects.all(), 'author'),
+                followers_count=count_of(Follow.objects.all(), 'author'),
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано групп: {groups}, авторов: {authors}'))
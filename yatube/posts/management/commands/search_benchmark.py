@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import rollback_after, seed_posts, summarize, timed
+from posts.models import Post
+from posts.search import WORD_RE, ContainsSearchBackend, get_search_backend
+
+MISSING_QUERY = 'несуществующее'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает полнотекстовый поиск с icontains '
+            'на базе из N постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000,
+                            help='Сколько постов создать.')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Сколько раз выполнять каждый запрос.')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Размер страницы результатов.')
+
+    def handle(self, *args, **options):
+        backends = {
+            'fulltext': get_search_backend(),
+            'icontains': ContainsSearchBackend(),
+        }
+        report = {'posts': options['posts'], 'queries': {}}
+        with rollback_after():
+            seed_posts(options['posts'])
+            # Слова из текста первого поста, редкий токен (один пост)
+            # и слово, которого нет в базе: icontains выигрывает только
+            # там, где совпадения находятся сразу.
+            words = WORD_RE.findall(Post.objects.earliest('pk').text)
+            queries = (words[0], ' '.join(words[1:3]),
+                       f'No{options["posts"] // 2}', MISSING_QUERY)
+            for query in queries:
+                report['queries'][query] = {
+                    name: summarize(timed(
+                        lambda: backend.search(query, options['limit']),
+                        options['repeat'],
+                    ))
+                    for name, backend in backends.items()
+                }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from core.reverse import cached_reverse
+
 User = get_user_model()
 
 
@@ -17,10 +19,57 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание сообщества'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
 
     def __str__(self) -> str:
         return f'{self.title}'
 
+    def get_absolute_url(self) -> str:
+        return cached_reverse('posts:group_list', self.slug)
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые поддерживаются при изменении постов."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+
+    def __str__(self) -> str:
+        return f'{self.author}: {self.posts_count}'
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты с автором и группой одним запросом и только с теми
+        колонками, которые выводятся в шаблонах.
+        """
+        return self.select_related('author', 'group').only(
+            'id', 'text', 'image', 'pub_date', 'updated_at',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug',
+        )
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -30,6 +79,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -44,10 +97,122 @@ class Post(models.Model):
         verbose_name='Сообщество',
         related_name='posts'
     )
+    image = models.ImageField(
+        upload_to='posts/',
+        blank=True,
+        verbose_name='Картинка'
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем группу из БД, чтобы при сохранении поправить счётчики.
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
 
     class Meta:
         ordering = ['-pub_date']
+        # Индексы под ленты: фильтр по группе/автору и сортировка
+        # по (pub_date, id) в том же порядке, что и у CursorPaginator.
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_id_idx'),
+            # Для быстрого MAX(updated_at) в валидаторах условных запросов.
+            models.Index(fields=['group', 'updated_at'],
+                         name='post_group_updated_idx'),
+            models.Index(fields=['author', 'updated_at'],
+                         name='post_author_updated_idx'),
+            models.Index(fields=['updated_at'],
+                         name='post_updated_at_idx'),
+        ]
 
     def __str__(self):
         MAX_TEXT = 15  # Ограничение для отображения текста
         return self.text[:MAX_TEXT]
+
+    def get_absolute_url(self) -> str:
+        return cached_reverse('posts:post_detail', self.pk)
+
+
+class Follow(models.Model):
+    """Подписка пользователя на автора или на сообщество."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Сообщество'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='follow_unique_author'),
+            models.UniqueConstraint(fields=['user', 'group'],
+                                    name='follow_unique_group'),
+            models.CheckConstraint(
+                check=(models.Q(author__isnull=True, group__isnull=False)
+                       | models.Q(author__isnull=False, group__isnull=True)),
+                name='follow_author_or_group',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации.
+
+    Дата публикации повторяет дату поста, чтобы лента читалась по индексу
+    (user, pub_date, post) без соединения с таблицей постов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='timeline_unique_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.post_id}'
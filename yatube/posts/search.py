@@ -0,0 +1,142 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite используется индекс FTS5 (таблица posts_post_fts), на других
+базах — запасной поиск через icontains. Бэкенд можно задать настройкой
+POSTS_SEARCH_BACKEND (путь до класса).
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_WORDS = 16
+WORD_RE = re.compile(r'\w+')
+
+
+def highlight(snippet: str):
+    """Экранирует фрагмент и превращает маркеры совпадений в <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResult:
+    def __init__(self, post, snippet):
+        self.post = post
+        self.snippet = highlight(snippet)
+
+
+class BaseSearchBackend(ABC):
+    @abstractmethod
+    def search(self, query: str, limit: int, offset: int = 0):
+        """Возвращает список SearchResult, лучшие совпадения первыми."""
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self, since_pk=None):
+        """Переиндексирует все посты или только посты с id > since_pk."""
+
+    @staticmethod
+    def load(hits):
+        """Достаёт посты для пар (id, фрагмент), сохраняя порядок."""
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in hits])
+        return [SearchResult(posts[pk], snippet)
+                for pk, snippet in hits if pk in posts]
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Поиск по индексу FTS5 с ранжированием bm25."""
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        # Каждое слово ищем как префикс, чтобы пост находился и по началу
+        # слова; кавычки защищают от синтаксиса FTS5 в запросе.
+        return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query))
+
+    def search(self, query, limit, offset=0):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_WORDS,
+                 expression, limit, offset],
+            )
+            return self.load(cursor.fetchall())
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self, since_pk=None):
+        since_pk = since_pk or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid > %s', [since_pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM {Post._meta.db_table} WHERE id > %s',
+                [since_pk])
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Запасной поиск без индекса: все слова через icontains."""
+
+    @staticmethod
+    def make_snippet(text: str, words) -> str:
+        lowered = text.lower()
+        positions = [lowered.find(word.lower()) for word in words]
+        start = max(0, min(pos for pos in positions if pos >= 0) - 60)
+        fragment = text[start:start + 200]
+        for word in words:
+            fragment = re.sub(
+                f'({re.escape(word)})', f'{MARK_START}\\1{MARK_END}',
+                fragment, flags=re.IGNORECASE)
+        return ('…' if start else '') + fragment
+
+    def search(self, query, limit, offset=0):
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(text__icontains=word)
+        rows = posts.values_list('pk', 'text')[offset:offset + limit]
+        return self.load([(pk, self.make_snippet(text, words))
+                          for pk, text in rows])
+
+
+def get_search_backend():
+    path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSSearchBackend()
+    return ContainsSearchBackend()
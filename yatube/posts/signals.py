@@ -0,0 +1,187 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import tasks
+from .cache import bump_generation, bump_stamp
+from .models import AuthorStats, Follow, Group, Post
+from .timeline import backfill, prune
+
+User = get_user_model()
+
+
+def change_author_count(author_id, delta: int, field='posts_count'):
+    counters = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        counters = counters.filter(**{f'{field}__gt': 0})
+    updated = counters.update(**{field: F(field) + delta})
+    if not updated and delta > 0:
+        _, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults={field: delta})
+        if not created:
+            counters.update(**{field: F(field) + delta})
+
+
+def change_group_count(group_id, delta: int, field='posts_count'):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(**{f'{field}__gt': 0})
+    groups.update(**{field: F(field) + delta})
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    # Группа до сохранения нужна всем обработчикам post_save (счётчики,
+    # кеш страниц старой группы), поэтому запоминается один раз здесь.
+    instance._old_group_id = getattr(instance, '_loaded_group_id', None)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+    elif instance._old_group_id != instance.group_id:
+        change_group_count(instance._old_group_id, -1)
+        change_group_count(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    bump_stamp('post', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    bump_stamp('group', instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_cards(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login, карточки не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_stamp('user', instance.pk)
+
+
+def post_page_scopes(post):
+    """Области кеша страниц, на которых выводится пост."""
+    scopes = ['index']
+    group_ids = {post.group_id, getattr(post, '_old_group_id', None)}
+    group_ids.discard(None)
+    if group_ids:
+        scopes += [
+            f'group:{slug}' for slug in Group.objects.filter(
+                pk__in=group_ids).values_list('slug', flat=True)
+        ]
+    if Post.author.is_cached(post):
+        usernames = [post.author.username]
+    else:
+        usernames = User.objects.filter(
+            pk=post.author_id).values_list('username', flat=True)
+    scopes += [f'author:{username}' for username in usernames]
+    return scopes
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    bump_generation(*post_page_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    bump_generation('index', f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_pages(sender, instance, created=False,
+                            update_fields=None, **kwargs):
+    # У нового пользователя ещё нет постов ни на одной странице.
+    if created or update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_generation('index', f'author:{instance.username}')
+
+
+# Индексация, миниатюры, раскладка по лентам и письма уходят в очередь
+# задач, чтобы не задерживать ответ автору. Счётчики и сброс кешей
+# остаются синхронными: это одиночные UPDATE, а их результат нужен сразу.
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or update_fields and 'text' not in update_fields:
+        return
+    tasks.index_post.enqueue(
+        args=[instance.pk],
+        key=f'index:{instance.pk}:{instance.updated_at.timestamp()}')
+
+
+@receiver(post_save, sender=Post)
+def make_thumbnails(sender, instance, raw=False, update_fields=None,
+                    **kwargs):
+    if raw or not instance.image or (
+            update_fields and 'image' not in update_fields):
+        return
+    queue_thumbnails(instance.pk, instance.image.name)
+
+
+def queue_thumbnails(post_id, image_name: str):
+    tasks.make_thumbnails.enqueue(
+        args=[post_id], key=f'thumbnails:{post_id}:{image_name}')
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    tasks.unindex_post.enqueue(args=[instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    tasks.fan_out_post.enqueue(
+        args=[instance.pk], key=f'fan_out:{instance.pk}')
+    tasks.notify_followers.enqueue(
+        args=[instance.pk], key=f'notify:{instance.pk}')
+
+
+def change_followers_count(follow, delta: int):
+    if follow.author_id is not None:
+        change_author_count(follow.author_id, delta, 'followers_count')
+    else:
+        change_group_count(follow.group_id, delta, 'followers_count')
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    change_followers_count(instance, 1)
+    backfill(instance)
+    # Кнопки подписки на страницах зависят от подписок пользователя.
+    bump_stamp('follows', instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_followers_count(instance, -1)
+    prune(instance)
+    bump_stamp('follows', instance.user_id)
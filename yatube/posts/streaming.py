@@ -0,0 +1,96 @@
+"""Потоковая отдача лент и выгрузок.
+
+Страница ленты рендерится шаблоном как обычно, только вместо цикла
+по постам шаблон выводит метку stream_marker. Всё до метки (шапка и
+навигация из base.html) уходит клиенту первым куском, затем карточки
+пачками по STREAM_CHUNK_SIZE, в конце — остаток страницы с паджинатором.
+Включается настройкой FEED_STREAMING для главной, групп и профиля.
+
+Чего потоковая отдача не даёт:
+- посты страницы читаются одним запросом до первого байта ответа:
+  паджинатору нужны первый и последний пост для ссылок-курсоров,
+  поэтому в памяти вся страница, а потоком идёт только отрисовка;
+- потоковый ответ не кладётся в кеш страниц для анонимов
+  (см. is_cacheable в posts/cache.py), и каждая лента для анонима
+  отрисовывается заново, хотя и из кеша карточек.
+
+Тело потокового ответа читается уже после выхода из представления,
+поэтому запросы привязываются к базе заранее (см. pinned) и не попадают
+в замеры PerformanceMiddleware.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import render_cards
+
+STREAM_MARKER = mark_safe('<!-- post-cards -->')
+CARD_SEPARATOR = '<hr>'
+
+
+def pinned(queryset):
+    """Запрос к той же базе, что выбрана сейчас (например, к реплике)."""
+    return queryset.using(queryset.db)
+
+
+def batches(items, size: int):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def cards_html(posts, request):
+    """Карточки постов через разделитель, пачка за пачкой."""
+    separator = ''
+    for batch in batches(posts, settings.STREAM_CHUNK_SIZE):
+        cards = render_cards(batch, request)
+        for post in batch:
+            yield separator + cards[post.pk]
+            separator = CARD_SEPARATOR
+
+
+def items_html(posts, request, item_template: str):
+    """Посты ленты по шаблону item_template через разделитель."""
+    template = get_template(item_template)
+    separator = ''
+    for post in posts:
+        yield separator + template.render({'post': post}, request)
+        separator = CARD_SEPARATOR
+
+
+def stream_feed(request, template_name, context, item_template=None):
+    page = context['page_obj']
+    # Шаблон без цикла по карточкам не вычисляет страницу, а курсорам
+    # паджинатора нужен список: у QuerySet нет индекса -1.
+    page.object_list = posts = list(page.object_list)
+    html = render_to_string(
+        template_name, dict(context, stream_marker=STREAM_MARKER), request)
+    head, tail = html.split(STREAM_MARKER, 1)
+
+    def content():
+        yield head
+        if item_template:
+            yield from items_html(posts, request, item_template)
+        else:
+            yield from cards_html(posts, request)
+        yield tail
+
+    return StreamingHttpResponse(content())
+
+
+def render_feed(request, template_name, context, item_template=None):
+    """render() для лент, потоковый при FEED_STREAMING.
+
+    Посты выводятся карточками post_card или, если задан item_template,
+    этим шаблоном, как в цикле обычной страницы.
+    """
+    if settings.FEED_STREAMING:
+        return stream_feed(request, template_name, context, item_template)
+    return render(request, template_name, context)
@@ -0,0 +1,79 @@
+"""Фоновые задачи постов: раскладка по лентам, поиск и уведомления."""
+from django.apps import apps
+from django.core.mail import send_mass_mail
+from django.db.models import Q
+from django.urls import reverse
+
+from core.tasks import task
+
+from .cache import bump_generation, bump_stamp
+from .counts import store_count
+from .models import Follow, Post
+from .search import get_search_backend
+from . import thumbnails
+from .timeline import fan_out
+
+
+@task()
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pub_date', 'author_id', 'group_id').first()
+    if post is not None:
+        fan_out(post)
+
+
+@task()
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).only('text').first()
+    if post is None:
+        # Пост успели удалить, пока задача ждала очереди.
+        get_search_backend().remove(post_id)
+    else:
+        get_search_backend().index(post)
+
+
+@task()
+def unindex_post(post_id):
+    get_search_backend().remove(post_id)
+
+
+@task()
+def make_thumbnails(post_id):
+    """Готовит миниатюры картинки поста и обновляет его карточки."""
+    from .signals import post_page_scopes
+
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    thumbnails.make_thumbnails(post.image)
+    bump_stamp('post', post.pk)
+    bump_generation(*post_page_scopes(post))
+
+
+@task()
+def refresh_table_count(label):
+    """Точно пересчитывает строки таблицы для паджинатора."""
+    model = apps.get_model(label)
+    store_count(model, model.objects.count())
+
+
+@task(max_attempts=5, retry_delay=30)
+def notify_followers(post_id):
+    """Пишет подписчикам автора и группы поста о новом посте.
+
+    Подписанный и на автора, и на группу получает одно письмо.
+    """
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None:
+        return
+    author = post.author.get_full_name() or post.author.username
+    subject = f'Новый пост: {author}'
+    body = (f'{author} опубликовал(а) новый пост:\n\n{post.text[:200]}\n\n'
+            f'{reverse("posts:post_detail", args=[post.pk])}')
+    followers = Q(author_id=post.author_id)
+    if post.group_id:
+        followers |= Q(group_id=post.group_id)
+    emails = Follow.objects.filter(followers).exclude(
+        user_id=post.author_id).exclude(user__email='').values_list(
+        'user__email', flat=True).distinct()
+    send_mass_mail([(subject, body, None, [email]) for email in emails])
@@ -0,0 +1,24 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cache import render_cards
+
+register = template.Library()
+
+CARDS_KEY = 'post_cards'
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_post_cards(context, posts):
+    """Достаёт карточки всей страницы из кеша одним запросом."""
+    cards = context.render_context.setdefault(CARDS_KEY, {})
+    cards.update(render_cards(posts, context.get('request')))
+    return ''
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    cards = context.render_context.setdefault(CARDS_KEY, {})
+    if post.pk not in cards:
+        cards.update(render_cards([post], context.get('request')))
+    return mark_safe(cards[post.pk])
@@ -0,0 +1,16 @@
+from django import template
+
+from ..thumbnails import ready_thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, sizes='100vw'):
+    """Картинка поста с srcset из готовых миниатюр."""
+    thumbnails = ready_thumbnails(post.image)
+    return {
+        'thumbnails': thumbnails,
+        'fallback': thumbnails[0] if thumbnails else None,
+        'sizes': sizes,
+    }
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Task
+
+from ..models import AuthorStats, Group, Post
+from ..search import get_search_backend
+
+User = get_user_model()
+
+
+class ImportExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='testgroup',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, text='Пост "с кавычками", и '
+                            'запятой\nв две строки', group=cls.group)
+        Post.objects.create(author=cls.user, text='Пост без группы')
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def round_trip(self, filename, batch_size):
+        path = os.path.join(self.tmp_dir.name, filename)
+        expected = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'updated_at', 'author', 'group', 'image'))
+        call_command('export_posts', path, stderr=StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', path, batch_size=batch_size,
+                     stdout=StringIO(), stderr=StringIO())
+        imported = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'updated_at', 'author', 'group', 'image'))
+        self.assertEqual(imported, expected)
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют посты, даты и связи."""
+        for filename in ('posts.jsonl', 'posts.csv', 'posts.jsonl.gz'):
+            with self.subTest(filename=filename):
+                self.round_trip(filename, batch_size=1)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_round_trip_keeps_images(self):
+        """Имя картинки переносится, а миниатюры ставятся в очередь."""
+        Post.objects.create(author=self.user, text='Пост с картинкой',
+                            image='posts/photo.gif')
+        Task.objects.all().delete()
+        self.round_trip('posts.csv', batch_size=10)
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual(post.image.name, 'posts/photo.gif')
+        self.assertEqual(
+            list(Task.objects.filter(
+                name='posts.tasks.make_thumbnails',
+            ).values_list('idempotency_key', flat=True)),
+            [f'thumbnails:{post.pk}:posts/photo.gif'])
+
+    def test_import_updates_derived_data(self):
+        """После загрузки обновлены счётчики и поисковый индекс."""
+        self.round_trip('posts.jsonl', batch_size=10)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 2)
+        results = get_search_backend().search('кавычками', limit=10)
+        self.assertEqual(len(results), 1)
+
+    def test_import_skips_unknown_author(self):
+        """Строки с неизвестным автором пропускаются."""
+        path = os.path.join(self.tmp_dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"text": "Пост", "author": "nobody"}\n')
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('пропущено строк: 1', out.getvalue())
+        self.assertFalse(Post.objects.filter(text='Пост').exists())
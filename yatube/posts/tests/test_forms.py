@@ -1,6 +1,15 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
 
 from ..models import Group, Post
 
@@ -51,3 +60,60 @@ class PostViewsTest(TestCase):
                   },
             follow=True)
         self.assertEqual(Post.objects.count(), total_posts + 1)
+
+
+def uploaded_image(name='photo.jpg', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'lightskyblue').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+class PostImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root, TASKS_EAGER=True)
+        cls.settings_override.enable()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_post(self):
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': uploaded_image(),
+        })
+        return Post.objects.get(text='Пост с картинкой')
+
+    def test_create_post_with_image(self):
+        """Картинка сохраняется, в ленте выводится srcset из миниатюр."""
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        # Оригинал в ленте не открывается: только готовые миниатюры.
+        with mock.patch.object(default.engine, 'get_image',
+                               side_effect=AssertionError):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'srcset=')
+        for width in (320, 640, 960):
+            self.assertContains(response, f' {width}w')
+        self.assertNotContains(response, post.image.url)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_feed_skips_image_until_thumbnails_ready(self):
+        """Пока миниатюры не готовы, карточка выводится без картинки."""
+        self.create_post()
+        with mock.patch.object(default.engine, 'get_image',
+                               side_effect=AssertionError):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост с картинкой')
+        self.assertNotContains(response, 'srcset=')
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import AuthorStats, Follow, Group, Post
 
 User = get_user_model()
 
@@ -60,3 +63,67 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).verbose_name, expected_value)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='testgroup',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='othergroup',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, смене группы и удалении."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group)
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertCounters(2, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(2, 0, 1)
+        post.delete()
+        self.assertCounters(1, 0, 0)
+
+    def test_rebuild_post_counters(self):
+        """Команда пересчёта восстанавливает счётчики."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Тестовый пост', group=self.group),
+            Post(author=self.user, text='Тестовый пост', group=self.group),
+        ])
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounters(2, 2, 0)
+
+    def test_rebuild_follower_counters(self):
+        """Пересчёт восстанавливает и счётчики подписчиков."""
+        follower = User.objects.create_user(username='follower')
+        Post.objects.create(author=self.user, text='Тестовый пост')
+        Follow.objects.create(user=follower, author=self.user)
+        Follow.objects.create(user=follower, group=self.group)
+        AuthorStats.objects.update(posts_count=0, followers_count=0)
+        Group.objects.update(followers_count=5)
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounters(1, 0, 0)
+        stats = AuthorStats.objects.get(author=self.user)
+        self.assertEqual(stats.followers_count, 1)
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.followers_count, 1)
+        self.assertEqual(self.other_group.followers_count, 0)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from core.models import Task
+from core.tasks import queue_stats, run_pending, task
+
+from ..models import Follow, Group, Post, TimelineEntry
+from ..search import get_search_backend
+
+User = get_user_model()
+
+
+@task(name='tests.flaky', max_attempts=2, retry_delay=0)
+def flaky():
+    raise RuntimeError('Не получилось')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_post_side_effects_are_queued(self):
+        """Побочные действия нового поста выполняет воркер, а не запрос."""
+        post = Post.objects.create(author=self.author, text='Набережная')
+        self.assertEqual(
+            set(Task.objects.values_list('name', flat=True)),
+            {'posts.tasks.index_post', 'posts.tasks.fan_out_post',
+             'posts.tasks.notify_followers'})
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(run_pending(), 3)
+        self.assertEqual(queue_stats()['depth']['done'], 3)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        results = get_search_backend().search('набережная', limit=10)
+        self.assertEqual([result.post for result in results], [post])
+
+    def test_group_followers_notified_once(self):
+        """Письмо получают и подписчики группы, каждый по одному разу."""
+        group = Group.objects.create(title='Группа', slug='group')
+        member = User.objects.create_user(
+            username='member', email='member@example.com')
+        Follow.objects.create(user=member, group=group)
+        Follow.objects.create(user=self.reader, group=group)
+        Post.objects.create(author=self.author, text='Пост', group=group)
+        run_pending()
+        self.assertEqual(sorted(email for message in mail.outbox
+                                for email in message.to),
+                         ['member@example.com', 'reader@example.com'])
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом не ставится повторно."""
+        first = flaky.enqueue(key='flaky:1')
+        second = flaky.enqueue(key='flaky:1')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failed_task_retried_then_failed(self):
+        """Упавшая задача повторяется, пока не кончатся попытки."""
+        job = flaky.enqueue()
+        with self.assertLogs('yatube.tasks', 'WARNING') as logs:
+            run_pending()
+        self.assertIn('повтор через', logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.PENDING, 1))
+        self.assertIn('Не получилось', job.last_error)
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+        self.assertEqual(queue_stats()['depth']['failed'], 1)
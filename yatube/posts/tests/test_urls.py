@@ -1,6 +1,9 @@
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
+from django.urls import reverse, set_script_prefix
+
+from core.reverse import cached_reverse
 
 from ..models import Group, Post
 
@@ -93,3 +96,23 @@ class PostURLTest(TestCase):
             with self.subTest(address=address):
                 response = self.author_client.get(address)
                 self.assertTemplateUsed(response, template)
+
+    def test_cached_urls_match_reverse(self):
+        """Запомненные ссылки совпадают с reverse()."""
+        self.assertEqual(
+            self.post.get_absolute_url(),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(
+            self.group.get_absolute_url(),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+        for _ in range(2):
+            self.assertEqual(
+                cached_reverse('posts:profile', self.user.username),
+                reverse('posts:profile',
+                        kwargs={'username': self.user.username}))
+        set_script_prefix('/yatube/')
+        try:
+            self.assertEqual(self.group.get_absolute_url(),
+                             '/yatube/group/testgroup/')
+        finally:
+            set_script_prefix('/')
@@ -1,10 +1,26 @@
+import base64
+import json
+import time
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 from django import forms
 from django.conf import settings
 
-from ..models import Group, Post
+from core.queries import assert_no_query_problems
+from core.routers import STICKY_COOKIE
+
+from ..cache import bump_stamp, get_stats
+from ..checks import check_count_cache
+from ..counts import estimated_count
+from ..models import Follow, Group, Post, TimelineEntry
+from ..utils import CURSOR_NEXT, CursorPaginator, decode_cursor
 
 User = get_user_model()
 TEST_POSTS_TOTAL = 15  # Создание постов для тестирования
@@ -162,6 +178,8 @@ class PaginatorTest(TestCase):
                                   text=f'Тестовый пост No{i}',
                                   group=cls.group))
         Post.objects.bulk_create(new_posts)
+        # bulk_create не вызывает сигналы, пересчитываем счётчики постов
+        call_command('rebuild_post_counters', stdout=StringIO())
 
     def test_paginator_first_page_ten_posts(self):
         """Проверка вывода кол-ва сообщений."""
@@ -180,3 +198,665 @@ class PaginatorTest(TestCase):
             self.assertEqual(count_posts_1st_page, settings.POST_PER_PAGE)
             self.assertEqual(count_posts_2nd_page,
                              Post.objects.count() - settings.POST_PER_PAGE)
+
+    def test_paginator_cursor_pages(self):
+        """Проверка перехода по курсорам на соседние страницы."""
+        address = reverse('posts:index')
+        first_page = self.author_client.get(address).context['page_obj']
+        response = self.author_client.get(
+            address, {'cursor': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page),
+                         Post.objects.count() - settings.POST_PER_PAGE)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(
+            set(first_page).isdisjoint(set(second_page)))
+        response = self.author_client.get(
+            address, {'cursor': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(first_page))
+
+    def test_paginator_broken_cursor(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.author_client.get(
+            reverse('posts:index'), {'cursor': 'broken'})
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.POST_PER_PAGE)
+        pub_date = Post.objects.latest('pk').pub_date.isoformat()
+        for pk in (10 ** 30, 0, True):
+            with self.subTest(pk=pk):
+                # Поддельный курсор с id, который не примет база.
+                token = base64.urlsafe_b64encode(json.dumps(
+                    [CURSOR_NEXT, pub_date, pk]).encode()).decode()
+                self.assertIsNone(decode_cursor(token))
+                response = self.author_client.get(
+                    reverse('posts:index'), {'cursor': token})
+                self.assertEqual(response.status_code, 200)
+
+    def test_elided_page_range(self):
+        """Число ссылок на страницы не зависит от числа страниц."""
+        paginator = CursorPaginator(Post.objects.all(), 10, count=1_000_000)
+        ellipsis = CursorPaginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50_000)),
+            [1, ellipsis, 49_998, 49_999, 50_000, 50_001, 50_002,
+             ellipsis, 100_000])
+        self.assertEqual(list(paginator.get_elided_page_range(1)),
+                         [1, 2, 3, ellipsis, 100_000])
+        small = CursorPaginator(Post.objects.all(), 10, count=30)
+        self.assertEqual(list(small.get_elided_page_range(2)), [1, 2, 3])
+
+
+@override_settings(POST_COUNT_MODE='estimated', EXACT_COUNT_THRESHOLD=5,
+                   TASKS_EAGER=True)
+class EstimatedCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='counted')
+        self.client.force_login(self.user)
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост No{i}') for i in range(6))
+
+    def test_index_uses_cached_count(self):
+        """Главная берёт число постов из кеша, а не COUNT(*)."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 6)
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(reverse('posts:index'))
+        # Счётчик обновится фоновой задачей, а пока остаётся прежним.
+        self.assertEqual(response.context['page_obj'].paginator.count, 6)
+        self.assertEqual(estimated_count(Post), 6)
+
+    def test_small_table_counts_exactly(self):
+        """Ниже порога число постов считается точно."""
+        with override_settings(EXACT_COUNT_THRESHOLD=100):
+            self.assertIsNone(estimated_count(Post))
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 6)
+
+    def test_estimated_mode_needs_shared_cache(self):
+        """Режим 'estimated' с кешем в памяти процесса не проходит check."""
+        self.assertEqual(
+            [error.id for error in check_count_cache(None)], ['posts.E001'])
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_table'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_count_cache(None), [])
+
+
+@override_settings(FEED_STREAMING=True, STREAM_CHUNK_SIZE=4)
+class StreamingFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='streamer')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Поток No{i}') for i in range(10))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_streams_header_first(self):
+        """Шапка уходит первой, затем карточки пачками."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<header>', chunks[0])
+        self.assertNotIn('Поток No', chunks[0])
+        content = ''.join(chunks)
+        for i in range(10):
+            self.assertIn(f'Поток No{i}', content)
+        self.assertEqual(content.count('<hr>'), 9)
+        self.assertIn('</html>', chunks[-1])
+
+    def test_feed_streams_with_next_page(self):
+        """Паджинатор потоковой ленты строит курсор на следующую страницу."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Ещё поток No{i}')
+            for i in range(settings.POST_PER_PAGE + 1 - 10))
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('<hr>'), settings.POST_PER_PAGE - 1)
+        self.assertIn('?cursor=', content)
+
+    def test_profile_streams_header_first(self):
+        """Лента автора тоже отдаётся потоком: сначала шапка, затем посты."""
+        # bulk_create не обновляет счётчик постов автора.
+        call_command('rebuild_post_counters', stdout=StringIO())
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username}))
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<header>', chunks[0])
+        self.assertNotIn('Поток No', chunks[0])
+        content = ''.join(chunks)
+        for i in range(10):
+            self.assertIn(f'Поток No{i}', content)
+        self.assertIn('</html>', chunks[-1])
+
+    def test_export_author_posts(self):
+        """Посты автора выгружаются потоком в JSONL и CSV."""
+        address = reverse('posts:profile_export',
+                          kwargs={'username': self.user.username})
+        response = self.client.get(address, {'format': 'jsonl'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(json.loads(lines[0])['author'], 'streamer')
+        response = self.client.get(address, {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 11)
+        response = self.client.get(address, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+
+class PostQueriesTest(TestCase):
+    """Количество запросов к БД не должно зависеть от числа постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа No1',
+            slug='testgroup1',
+            description='Описание тестовой группы No1',
+        )
+        for i in range(settings.POST_PER_PAGE):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(
+                title=f'Группа No{i}',
+                slug=f'group{i}',
+                description='Описание группы',
+            )
+            Post.objects.create(author=author, text=f'Пост No{i}',
+                                group=group)
+            Post.objects.create(author=cls.user, text=f'Пост автора No{i}',
+                                group=cls.group)
+        cls.post = Post.objects.filter(author=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_pages_queries(self):
+        """Проверка количества запросов на страницах постов."""
+        pages = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list',
+                    kwargs={'slug': self.group.slug}): 4,
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}): 4,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.post.id}): 2,
+        }
+        for address, queries in pages.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(address)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа No1',
+            slug='testgroup1',
+            description='Описание тестовой группы No1',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост No1',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        # Страницы для анонимов кешируются целиком, поэтому карточки
+        # проверяем под авторизованным пользователем.
+        self.viewer_client = Client()
+        self.viewer_client.force_login(
+            User.objects.create_user(username='viewer'))
+
+    def test_card_cached_and_invalidated(self):
+        """Карточка берётся из кеша и сбрасывается при изменениях."""
+        self.viewer_client.get(reverse('posts:index'))
+        self.viewer_client.get(reverse('posts:index'))
+        self.assertEqual(get_stats(), {'hits': 1, 'misses': 1})
+        changes = (
+            (self.post, 'text', 'Обновлённый пост'),
+            (self.group, 'title', 'Новое название'),
+            (self.user, 'first_name', 'Лев'),
+        )
+        for obj, field, value in changes:
+            with self.subTest(field=field):
+                setattr(obj, field, value)
+                obj.save()
+                response = self.viewer_client.get(reverse('posts:index'))
+                self.assertContains(response, value)
+
+    def test_cache_stats_for_staff_only(self):
+        """Статистика кеша доступна только персоналу."""
+        address = reverse('posts:cache_stats')
+        self.assertEqual(self.guest_client.get(address).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.guest_client.force_login(staff)
+        response = self.guest_client.get(address)
+        self.assertEqual(response.json()['misses'], 0)
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.other_user = User.objects.create_user(username='otherauthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа No1',
+            slug='testgroup1',
+            description='Описание тестовой группы No1',
+        )
+        cls.other_group = Group.objects.create(
+            title='Тестовая группа No2',
+            slug='testgroup2',
+            description='Описание тестовой группы No2',
+        )
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+        Post.objects.create(
+            author=cls.other_user, text='Пост', group=cls.other_group)
+        cls.pages = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list',
+                             kwargs={'slug': cls.group.slug}),
+            'other_group': reverse('posts:group_list',
+                                   kwargs={'slug': cls.other_group.slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': cls.user.username}),
+            'other_profile': reverse(
+                'posts:profile',
+                kwargs={'username': cls.other_user.username}),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def rendered_pages(self):
+        """Имена страниц, которые были отрисованы, а не взяты из кеша."""
+        return {
+            name for name, address in self.pages.items()
+            if self.guest_client.get(address).context is not None
+        }
+
+    def test_anonymous_pages_cached(self):
+        """Повторный запрос анонима отдаётся из кеша."""
+        self.assertEqual(self.rendered_pages(), set(self.pages))
+        self.assertEqual(self.rendered_pages(), set())
+        response = self.author_client.get(self.pages['index'])
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_affected_pages(self):
+        """Новый пост сбрасывает только затронутые страницы."""
+        self.rendered_pages()
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        self.assertEqual(self.rendered_pages(),
+                         {'index', 'group', 'profile'})
+        response = self.guest_client.get(self.pages['group'])
+        self.assertContains(response, 'Новый пост')
+
+    def test_moved_post_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает страницы обеих."""
+        self.rendered_pages()
+        post = Post.objects.get(author=self.user)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.rendered_pages(),
+                         {'index', 'group', 'other_group', 'profile'})
+        response = self.guest_client.get(self.pages['group'])
+        self.assertNotContains(response, reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа No1',
+            slug='testgroup1',
+            description='Описание тестовой группы No1',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост No1',
+            group=cls.group,
+        )
+        cls.addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_not_modified_until_post_edit(self):
+        """Страница отвечает 304 на совпавший ETag до изменения поста."""
+        etags = {}
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertFalse(response.has_header('Last-Modified'))
+                etags[address] = response['ETag']
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[address])
+                self.assertEqual(response.status_code, 304)
+        self.post.text = 'Обновлённый пост'
+        self.post.save()
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[address])
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Авторизованный пользователь не получает ETag анонима."""
+        address = self.addresses[0]
+        etag = self.guest_client.get(address)['ETag']
+        self.guest_client.force_login(self.user)
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_etag_changes_when_thumbnails_ready(self):
+        """Готовые миниатюры меняют ETag страницы поста."""
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': self.post.id})
+        etag = self.guest_client.get(address)['ETag']
+        # Так делает задача make_thumbnails: updated_at не меняется.
+        bump_stamp('post', self.post.id)
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_alone_not_honoured(self):
+        """Без ETag дата не даёт 304: ленту меняет не только updated_at."""
+        address = self.addresses[1]
+        self.guest_client.get(address)
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.guest_client.get(
+            address, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertContains(response, 'Переименованная группа')
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Прогулка по набережной вдоль реки',
+        )
+        Post.objects.create(author=cls.user, text='Тестовый пост No2')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query})
+        return response.context['results']
+
+    def test_search_highlights_matches(self):
+        """Поиск находит пост по началу слова и подсвечивает совпадение."""
+        results = self.search('набережн')
+        self.assertEqual([result.post for result in results], [self.post])
+        self.assertIn('<mark>набережной</mark>', results[0].snippet)
+
+    def test_search_page_out_of_range(self):
+        """Номер страницы за пределами 64 бит даёт 404, а не ошибку базы."""
+        response = self.guest_client.get(
+            reverse('posts:search'),
+            {'q': 'набережн', 'page': '99999999999999999999'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.post.text = 'Закат над <морем>'
+        self.post.save()
+        self.assertEqual(self.search('набережной'), [])
+        results = self.search('морем')
+        self.assertIn('&lt;<mark>морем</mark>&gt;', results[0].snippet)
+        self.post.delete()
+        self.assertEqual(self.search('морем'), [])
+
+    @override_settings(
+        POSTS_SEARCH_BACKEND='posts.search.ContainsSearchBackend')
+    def test_search_fallback_backend(self):
+        """Запасной бэкенд ищет через icontains."""
+        results = self.search('набережной')
+        self.assertEqual([result.post for result in results], [self.post])
+        self.assertIn('<mark>набережной</mark>', results[0].snippet)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PERF_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        """Замеренный запрос отдаёт Server-Timing и пишет строку в лог."""
+        with self.assertLogs('yatube.perf', 'INFO') as logs:
+            response = Client().get(reverse('posts:index'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertGreater(record['sql_count'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertEqual(record['cache_misses'], 2)
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_disabled_without_sampling(self):
+        """При нулевой доле выборки заголовка нет."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class QueryInspectorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(1, 5):
+            author = User.objects.create_user(username=f'author{number}')
+            group = Group.objects.create(
+                title=f'Группа No{number}', slug=f'group{number}')
+            Post.objects.create(author=author, group=group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_have_no_query_problems(self):
+        """Ленты не делают повторных запросов на каждый пост."""
+        client = Client()
+        client.force_login(User.objects.get(username='author1'))
+        for address in (reverse('posts:index'),
+                        reverse('posts:group_list',
+                                kwargs={'slug': 'group1'}),
+                        reverse('posts:profile',
+                                kwargs={'username': 'author1'})):
+            with self.subTest(address=address):
+                with assert_no_query_problems():
+                    client.get(address)
+
+    def test_n_plus_one_reported_with_template_line(self):
+        """Запрос автора в цикле шаблона находится со строкой шаблона."""
+        template = Template(
+            '{% for post in posts %}\n{{ post.author.username }}'
+            '{% endfor %}')
+        with self.assertRaisesMessage(AssertionError, 'повторён 4 раз'):
+            with assert_no_query_problems() as inspector:
+                template.render(Context({'posts': Post.objects.all()}))
+        finding = inspector.duplicates(threshold=3)[0]
+        self.assertTrue(finding['template'].endswith(':2'))
+        self.assertTrue(finding['source'].startswith('posts/tests/'))
+
+
+class FollowTimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='testgroup')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def feed(self, client, cursor=None):
+        data = {'cursor': cursor} if cursor else {}
+        return client.get(reverse('posts:follow_index'), data).context[
+            'page_obj']
+
+    def follow_author(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+
+    def test_follow_and_unfollow_author(self):
+        """Пост автора попадает только в ленты подписчиков."""
+        self.follow_author()
+        self.follow_author()
+        self.assertEqual(self.author.post_stats.followers_count, 1)
+        post = Post.objects.create(author=self.author, text='Пост автора')
+        self.assertEqual(list(self.feed(self.reader_client)), [post])
+        self.assertEqual(list(self.feed(self.stranger_client)), [])
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(list(self.feed(self.reader_client)), [])
+
+    def test_cannot_follow_self(self):
+        """Подписаться на самого себя нельзя."""
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'reader'}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_group_backfills_feed(self):
+        """Подписка на сообщество добавляет в ленту его прошлые посты."""
+        post = Post.objects.create(
+            author=self.stranger, group=self.group, text='Пост в группе')
+        self.reader_client.get(reverse(
+            'posts:group_follow', kwargs={'slug': self.group.slug}))
+        self.assertEqual(list(self.feed(self.reader_client)), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_merged_on_read(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+        self.follow_author()
+        self.reader_client.get(reverse(
+            'posts:group_follow', kwargs={'slug': self.group.slug}))
+        for i in range(settings.POST_PER_PAGE + 3):
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост No{i}')
+        self.assertFalse(TimelineEntry.objects.exists())
+        first = self.feed(self.reader_client)
+        second = self.feed(self.reader_client, first.next_cursor)
+        posts = list(first) + list(second)
+        self.assertEqual(posts, list(Post.objects.order_by('-pub_date',
+                                                           '-pk')))
+        self.assertFalse(second.has_next())
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    """В тестах реплика — отдельная пустая база, а не копия default."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testauthor')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_feeds_read_from_replica(self):
+        """Ленты и страница поста читаются с реплики."""
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        response = self.author_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_writes_go_to_primary_and_pin_reads(self):
+        """Запись идёт в default, после неё пользователь читает оттуда же."""
+        self.author_client.post(reverse('posts:post_create'),
+                                data={'text': 'Новый пост'})
+        self.assertTrue(Post.objects.filter(text='Новый пост').exists())
+        self.assertFalse(
+            Post.objects.using('replica').filter(text='Новый пост').exists())
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.author_client.cookies.pop(STICKY_COOKIE)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_lagging_replica_does_not_poison_cards(self):
+        """Старая версия поста с реплики не попадает в карточку писателя."""
+        User.objects.using('replica').bulk_create([
+            User(pk=self.user.pk, username=self.user.username)])
+        Post.objects.using('replica').bulk_create([
+            Post(pk=self.post.pk, author_id=self.user.pk,
+                 text='Старый текст')])
+        Post.objects.using('replica').filter(pk=self.post.pk).update(
+            pub_date=self.post.pub_date, updated_at=self.post.updated_at)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        self.assertContains(reader.get(reverse('posts:index')),
+                            'Старый текст')
+        self.author_client.cookies[STICKY_COOKIE] = str(time.time() + 60)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Старый текст')
+
+    def test_follow_on_get_pins_reads(self):
+        """Подписка по ссылке (GET) тоже переводит чтение на default."""
+        author = User.objects.create_user(username='followed')
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                self.author_client.cookies.pop(STICKY_COOKIE, None)
+                self.author_client.get(
+                    reverse(name, kwargs={'username': author.username}))
+                self.assertIn(STICKY_COOKIE, self.author_client.cookies)
+        response = self.author_client.get(
+            reverse('posts:profile', kwargs={'username': author.username}))
+        self.assertFalse(response.context['following'])
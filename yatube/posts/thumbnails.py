@@ -0,0 +1,51 @@
+"""Миниатюры картинок постов.
+
+Миниатюры всех ширин POST_IMAGE_WIDTHS готовит фоновая задача
+make_thumbnails. Шаблоны лент только ищут готовые миниатюры в
+key-value хранилище sorl (кеш поверх таблицы): без обращений к
+файловой системе и без декодирования оригинала. Пока миниатюры не
+готовы, карточка выводится без картинки.
+"""
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.engines.pil_engine import Engine as PILEngine
+from sorl.thumbnail.images import ImageFile
+
+
+class Engine(PILEngine):
+    def _scale(self, image, width, height):
+        # Image.ANTIALIAS из исходного движка — старое имя LANCZOS.
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+def thumbnail_options() -> dict:
+    """Все параметры миниатюры явно: от них зависит её имя в хранилище."""
+    return dict(default.backend.default_options, upscale=False)
+
+
+def make_thumbnails(image):
+    """Создаёт миниатюры всех ширин; вызывается из фоновой задачи."""
+    options = thumbnail_options()
+    return [get_thumbnail(image, str(width), **options)
+            for width in settings.POST_IMAGE_WIDTHS]
+
+
+def ready_thumbnails(image):
+    """Готовые миниатюры из key-value хранилища, от узкой к широкой.
+
+    Миниатюры шире оригинала совпадают с ним по размеру, повторы
+    отбрасываются.
+    """
+    if not image:
+        return []
+    source = ImageFile(image)
+    options = thumbnail_options()
+    thumbnails = {}
+    for width in settings.POST_IMAGE_WIDTHS:
+        name = default.backend._get_thumbnail_filename(
+            source, str(width), options)
+        thumbnail = default.kvstore.get(ImageFile(name, default.storage))
+        if thumbnail is not None:
+            thumbnails.setdefault(thumbnail.width, thumbnail)
+    return [thumbnails[width] for width in sorted(thumbnails)]
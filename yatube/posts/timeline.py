@@ -0,0 +1,173 @@
+"""Лента подписок: раскладка постов при записи и слияние при чтении.
+
+Новый пост сразу записывается в ленты (TimelineEntry) всех подписчиков
+автора и сообщества. У популярных авторов и сообществ подписчиков
+слишком много для такой раскладки: их посты не раскладываются, а
+подмешиваются при чтении ленты прямо из таблицы постов.
+
+Если популярный автор потерял подписчиков и опустился ниже порога,
+посты, написанные им в популярности, в ленты уже не попадут; новые
+посты снова раскладываются как обычно.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from .models import AuthorStats, Follow, Group, Post, TimelineEntry
+from .utils import (CURSOR_NEXT, CURSOR_PREVIOUS, CursorPage, decode_cursor,
+                    keyset_filter)
+
+FAN_OUT_BATCH = 1000
+
+
+def is_popular(followers_count) -> bool:
+    return (followers_count or 0) >= settings.TIMELINE_FANOUT_LIMIT
+
+
+def add_entries(user_ids, posts):
+    """Добавляет посты в ленты пользователей, пропуская уже добавленные."""
+    user_ids = iter(user_ids)
+    while True:
+        batch = list(islice(user_ids, FAN_OUT_BATCH))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post_id,
+                           pub_date=pub_date)
+             for user_id in batch for post_id, pub_date in posts],
+            ignore_conflicts=True,
+        )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора и группы."""
+    sources = Q()
+    author_followers = AuthorStats.objects.filter(
+        author_id=post.author_id).values_list(
+        'followers_count', flat=True).first()
+    if not is_popular(author_followers):
+        sources |= Q(author_id=post.author_id)
+    if post.group_id is not None:
+        group_followers = Group.objects.filter(
+            pk=post.group_id).values_list('followers_count', flat=True).first()
+        if not is_popular(group_followers):
+            sources |= Q(group_id=post.group_id)
+    if not sources:
+        return
+    user_ids = Follow.objects.filter(sources).values_list(
+        'user_id', flat=True).distinct().iterator(chunk_size=FAN_OUT_BATCH)
+    add_entries(user_ids, [(post.pk, post.pub_date)])
+
+
+def backfill(follow):
+    """Добавляет в ленту последние посты автора или сообщества из подписки.
+
+    Посты популярных подмешиваются при чтении, их добавлять не нужно.
+    """
+    if follow.author_id is not None:
+        followers = AuthorStats.objects.filter(
+            author_id=follow.author_id).values_list(
+            'followers_count', flat=True).first()
+        posts = Post.objects.filter(author_id=follow.author_id)
+    else:
+        followers = Group.objects.filter(
+            pk=follow.group_id).values_list(
+            'followers_count', flat=True).first()
+        posts = Post.objects.filter(group_id=follow.group_id)
+    if is_popular(followers):
+        return
+    recent = posts.order_by('-pub_date', '-pk').values_list(
+        'pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    add_entries([follow.user_id], list(recent))
+
+
+def prune(follow):
+    """Убирает из ленты посты, которые пришли только по этой подписке."""
+    entries = TimelineEntry.objects.filter(user_id=follow.user_id)
+    others = Follow.objects.filter(user_id=follow.user_id).exclude(
+        pk=follow.pk)
+    if follow.author_id is not None:
+        entries = entries.filter(post__author_id=follow.author_id).exclude(
+            post__group__in=others.exclude(group=None).values('group'))
+    else:
+        entries = entries.filter(post__group_id=follow.group_id).exclude(
+            post__author__in=others.exclude(author=None).values('author'))
+    entries.delete()
+
+
+class TimelinePaginator(Paginator):
+    """Лента подписок пользователя страницами по курсору.
+
+    Записи ленты сливаются с постами популярных авторов и сообществ.
+    Из каждого источника читается не больше страницы, поэтому стоимость
+    чтения не зависит ни от длины ленты, ни от числа подписок.
+    """
+
+    def __init__(self, user, per_page, **kwargs):
+        super().__init__([], per_page, **kwargs)
+        self.user = user
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def sources(self):
+        """Запросы и поле с id поста для каждого источника ленты."""
+        yield TimelineEntry.objects.filter(user=self.user), 'post_id'
+        limit = settings.TIMELINE_FANOUT_LIMIT
+        popular = Follow.objects.filter(user=self.user).filter(
+            Q(author__post_stats__followers_count__gte=limit)
+            | Q(group__followers_count__gte=limit)
+        ).values_list('author_id', 'group_id')
+        for author_id, group_id in popular:
+            if author_id is not None:
+                yield Post.objects.filter(author_id=author_id), 'pk'
+            else:
+                yield Post.objects.filter(group_id=group_id), 'pk'
+
+    def merged_keys(self, cursor):
+        """Ключи (pub_date, id поста) следующей страницы из всех источников.
+
+        Берётся на один ключ больше страницы, чтобы знать, есть ли ещё.
+        """
+        direction = cursor[0] if cursor else CURSOR_NEXT
+        newest_first = direction == CURSOR_NEXT
+        streams = []
+        for queryset, pk_field in self.sources():
+            if cursor:
+                queryset = queryset.filter(keyset_filter(
+                    cursor[1], cursor[2], direction, pk_field))
+            order = (('-pub_date', f'-{pk_field}') if newest_first
+                     else ('pub_date', pk_field))
+            streams.append(list(queryset.order_by(*order).values_list(
+                'pub_date', pk_field)[:self.per_page + 1]))
+        keys = []
+        seen = set()
+        for pub_date, pk in heapq.merge(*streams, reverse=newest_first):
+            if pk in seen:
+                continue
+            seen.add(pk)
+            keys.append((pub_date, pk))
+            if len(keys) > self.per_page:
+                break
+        return keys
+
+    def cursor_page(self, token):
+        """Страница ленты по токену курсора; без токена — первая."""
+        cursor = decode_cursor(token) if token else None
+        keys = self.merged_keys(cursor)
+        if cursor and cursor[0] == CURSOR_PREVIOUS:
+            if len(keys) <= self.per_page:
+                return self.cursor_page(None)
+            keys = keys[:self.per_page]
+            keys.reverse()
+            has_next = True
+        else:
+            has_next = len(keys) > self.per_page
+            keys = keys[:self.per_page]
+        posts = Post.objects.for_feed().in_bulk([pk for _, pk in keys])
+        return self._get_page(
+            [posts[pk] for _, pk in keys if pk in posts], None, self,
+            has_next=has_next, has_previous=cursor is not None)
@@ -1,7 +1,186 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
 
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
-def page_num(request, objects, pages: int):
-    paginator = Paginator(objects, pages)
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+# Наибольший id, который помещается в целочисленный столбец базы
+MAX_PK = 2 ** 63 - 1
+
+
+def encode_cursor(post, direction=CURSOR_NEXT) -> str:
+    """Упаковывает позицию поста в ленте в непрозрачный токен."""
+    raw = json.dumps([direction, post.pub_date.isoformat(), post.pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, pub_date, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode()).decode())
+        pub_date = parse_datetime(pub_date)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    # bool — подкласс int, а id за пределами 64 бит база не примет.
+    if (direction not in (CURSOR_NEXT, CURSOR_PREVIOUS)
+            or pub_date is None or type(pk) is not int
+            or not 1 <= pk <= MAX_PK):
+        return None
+    return direction, pub_date, pk
+
+
+def keyset_filter(pub_date, pk, direction=CURSOR_NEXT, pk_field='pk'):
+    """Условие на посты после (или до) позиции (pub_date, pk) в ленте.
+
+    Отдельное условие на pub_date даёт базе границу для поиска по индексу,
+    а не просмотр всех более свежих постов. pk_field — поле с id поста,
+    если лента строится не по самой таблице постов.
+    """
+    if direction == CURSOR_NEXT:
+        return Q(pub_date__lte=pub_date) & (
+            Q(pub_date__lt=pub_date) | Q(**{f'{pk_field}__lt': pk}))
+    return Q(pub_date__gte=pub_date) & (
+        Q(pub_date__gt=pub_date) | Q(**{f'{pk_field}__gt': pk}))
+
+
+class CursorPage(Page):
+    """Страница ленты со ссылками-курсорами на соседние страницы.
+
+    Для страниц, полученных по курсору, номер страницы неизвестен
+    (number is None), а наличие соседей определяется выборкой.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return encode_cursor(self.object_list[-1], CURSOR_NEXT)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0], CURSOR_PREVIOUS)
+        return None
+
+    @cached_property
+    def elided_page_range(self):
+        """Номера страниц для ссылок паджинатора вокруг текущей."""
+        if self.number is None:
+            return []
+        return list(self.paginator.get_elided_page_range(self.number))
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор ленты постов по ключу (pub_date, id).
+
+    Номерные страницы (?page=) работают как у обычного Paginator,
+    а страницы по курсору (?cursor=) выбираются условием на ключ
+    без OFFSET и COUNT(*), поэтому их стоимость не зависит от глубины.
+    """
+
+    # Пропуск в списке номеров страниц
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(
+            object_list.order_by('-pub_date', '-pk'), per_page, **kwargs)
+        self.stored_count = count
+
+    @cached_property
+    def count(self):
+        """Сохранённый счётчик постов, если он передан, иначе COUNT(*)."""
+        if self.stored_count is not None:
+            return self.stored_count
+        return super().count
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц с пропусками: края и окно вокруг number.
+
+        В отличие от page_range, длина не зависит от числа страниц:
+        не больше 2 * (on_each_side + on_ends) + 3 элементов, где
+        пропущенные участки заменены на ELLIPSIS.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def cursor_page(self, token):
+        """Возвращает страницу по токену курсора.
+
+        Для пустого или битого токена возвращается первая страница.
+        """
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            return self._first_page()
+        direction, pub_date, pk = cursor
+        if direction == CURSOR_NEXT:
+            rows = list(self.object_list.filter(
+                keyset_filter(pub_date, pk, CURSOR_NEXT)
+            )[:self.per_page + 1])
+            return self._get_page(
+                rows[:self.per_page], None, self,
+                has_next=len(rows) > self.per_page, has_previous=True)
+        rows = list(self.object_list.filter(
+            keyset_filter(pub_date, pk, CURSOR_PREVIOUS)
+        ).order_by('pub_date', 'pk')[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            # Дошли до начала ленты: показываем обычную первую страницу.
+            return self._first_page()
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._get_page(
+            rows, None, self, has_next=True, has_previous=True)
+
+    def _first_page(self):
+        rows = list(self.object_list[:self.per_page + 1])
+        return self._get_page(
+            rows[:self.per_page], 1, self,
+            has_next=len(rows) > self.per_page, has_previous=False)
+
+
+def page_num(request, objects, pages: int, count=None):
+    paginator = CursorPaginator(objects, pages, count=count)
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return paginator.cursor_page(cursor)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
@@ -1,44 +1,111 @@
 from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User
+from .models import AuthorStats, Follow, Post, Group, User
 from .forms import PostForm
-from .utils import page_num
+from .utils import MAX_PK, page_num
+from .counts import estimated_count
+from .timeline import TimelinePaginator
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from core.routers import use_replica, writes_on_get
+from .search import get_search_backend
+from . import exchange
+from .streaming import pinned, render_feed
+from .cache import (author_scope, cache_anonymous_page, get_stats,
+                    group_scope, index_scope)
+from .conditional import (author_state, conditional_page, group_state,
+                          index_state, post_state)
 
 
+EXPORT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def author_posts_count(author) -> int:
+    try:
+        return author.post_stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return 0
+
+
+def is_following(user, **target) -> bool:
+    return (user.is_authenticated
+            and Follow.objects.filter(user=user, **target).exists())
+
+
+@use_replica
+@conditional_page(index_state)
+@cache_anonymous_page(index_scope)
 def index(request):
-    post_list = Post.objects.select_related('author', 'group').all()
-    page_obj = page_num(request, post_list, settings.POST_PER_PAGE)
+    post_list = Post.objects.for_feed()
+    page_obj = page_num(request, post_list, settings.POST_PER_PAGE,
+                        count=estimated_count(Post))
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return render_feed(request, 'posts/index.html', context)
 
 
+@use_replica
+@conditional_page(group_state)
+@cache_anonymous_page(group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = page_num(request, post_list, settings.POST_PER_PAGE)
+    post_list = group.posts.for_feed()
+    page_obj = page_num(request, post_list, settings.POST_PER_PAGE,
+                        count=group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'following': is_following(request.user, group=group),
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_feed(request, 'posts/group_list.html', context)
 
 
+@use_replica
+@conditional_page(author_state)
+@cache_anonymous_page(author_scope)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
-    page_obj = page_num(request, post_list, settings.POST_PER_PAGE)
+    author = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username)
+    post_list = author.posts.for_feed()
+    page_obj = page_num(request, post_list, settings.POST_PER_PAGE,
+                        count=author_posts_count(author))
     context = {
         'author': author,
         'page_obj': page_obj,
+        'following': is_following(request.user, author=author),
     }
-    return render(request, 'posts/profile.html', context)
+    return render_feed(request, 'posts/profile.html', context,
+                       item_template='includes/profile_post.html')
+
+
+@use_replica
+def profile_export(request, username):
+    """Потоковая выгрузка всех постов автора в JSONL или CSV."""
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in exchange.FORMATS:
+        raise Http404
+    author = get_object_or_404(User, username=username)
+    rows = exchange.export_rows(
+        pinned(author.posts.all()), settings.STREAM_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        exchange.serialize(rows, fmt), content_type=EXPORT_TYPES[fmt])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}-posts.{fmt}"')
+    return response
 
 
+@use_replica
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__post_stats'),
+        pk=post_id,
+    )
     context = {
         'post': post,
     }
@@ -49,6 +116,7 @@ def post_detail(request, post_id):
 def post_create(request):
     form = PostForm(
         data=request.POST or None,
+        files=request.FILES or None,
     )
 
     if not form.is_valid():
@@ -63,13 +131,14 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('posts:post_detail', post.id)
 
     form = PostForm(
         data=request.POST or None,
+        files=request.FILES or None,
         instance=post,
     )
 
@@ -84,3 +153,79 @@ def post_edit(request, post_id):
     }
     template = 'posts/create_post.html'
     return render(request, template, context)
+
+
+@login_required
+@use_replica
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, settings.POST_PER_PAGE)
+    page_obj = paginator.cursor_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@writes_on_get
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@writes_on_get
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username).delete()
+    return redirect('posts:profile', username)
+
+
+@login_required
+@writes_on_get
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    Follow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+@writes_on_get
+def group_unfollow(request, slug):
+    Follow.objects.filter(user=request.user, group__slug=slug).delete()
+    return redirect('posts:group_list', slug)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    per_page = settings.POST_PER_PAGE
+    # Смещение больше 64-битного целого база не примет.
+    if (page - 1) * per_page > MAX_PK:
+        raise Http404
+    results = []
+    if query:
+        # Берём на один результат больше, чтобы знать о следующей странице.
+        results = get_search_backend().search(
+            query, limit=per_page + 1, offset=(page - 1) * per_page)
+    context = {
+        'query': query,
+        'results': results[:per_page],
+        'page': page,
+        'has_next': len(results) > per_page,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Попадания и промахи кеша карточек постов."""
+    stats = get_stats()
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 3) if total else 0
+    return JsonResponse(stats)
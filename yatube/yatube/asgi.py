@@ -0,0 +1,76 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 не умеет обрабатывать запросы асинхронно, поэтому ASGI-сервер
+(например, uvicorn yatube.asgi:application) получает WSGI-приложение
+через адаптер asgiref. Стандартный WsgiToAsgi выполняет все запросы в
+одном потоке, и сервер обрабатывал бы их строго по очереди; здесь
+запросы выполняются в пуле из ASGI_THREADS потоков, как у потокового
+WSGI-сервера, а медленная отдача клиенту не занимает поток.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+class PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(
+            self.run_in_thread, thread_sensitive=False,
+            executor=self.executor,
+        )(body)
+
+    def run_in_thread(self, body):
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            self.sync_send(self.response_start)
+            for chunk in response:
+                self.sync_send({'type': 'http.response.body',
+                                'body': chunk, 'more_body': True})
+            self.sync_send({'type': 'http.response.body'})
+        finally:
+            # close() отправляет request_finished, и Django закрывает
+            # подключения к базе, как после обычного WSGI-запроса.
+            response.close()
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WSGI-приложение за ASGI-интерфейсом с общим пулом потоков."""
+
+    def __init__(self, wsgi_application, threads: int):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        await PooledWsgiToAsgiInstance(
+            self.wsgi_application, self.executor)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = PooledWsgiToAsgi(
+    get_wsgi_application(), settings.ASGI_THREADS)
@@ -45,15 +45,21 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'about',
-    'core',
+    'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +90,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Сколько запросов одновременно выполняет yatube/asgi.py
+ASGI_THREADS: int = int(os.environ.get('ASGI_THREADS', 16))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -92,6 +101,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    # Реплика для чтения лент: копия основной базы, которую наполняет
+    # внешняя репликация. Без DB_REPLICA_NAME это тот же файл.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'DB_REPLICA_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+    },
+}
+
+# Профиль базы данных: DB_PROFILE=production включает WAL и остальные
+# PRAGMA из core/sqlite.py и держит подключения открытыми между запросами.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+# PRAGMA профиля production: WAL, чтобы читатели не ждали писателя,
+# и busy_timeout, чтобы писатели ждали друг друга, а не получали
+# «database is locked».
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кеша страниц в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+
+# PRAGMA, которые выполняются для каждого нового подключения к SQLite
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Алиасы, с которых читают ленты (см. core/routers.py)
+DATABASE_REPLICAS = ['replica'] if os.environ.get('DB_REPLICA_NAME') else []
+
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_STICKY_SECONDS: int = 5
+
+
+# Задачи воркера run_tasks сбрасывают кеши карточек и страниц, поэтому
+# без TASKS_EAGER нужен кеш, общий для всех процессов (см. core/checks.py),
+# например CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -133,6 +194,37 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику для профиля production
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_build')
+
+# Профиль статики: с STATIC_PROFILE=production collectstatic вычищает
+# неиспользуемые правила CSS и кладёт файлы с хешем содержимого в имени
+# и их копии .gz и .br (см. core/storage.py), а WhiteNoise отдаёт их
+# сжатыми и с Cache-Control: immutable. Без него статика отдаётся
+# из исходных каталогов.
+STATIC_PROFILE = os.environ.get('STATIC_PROFILE', 'default')
+
+if STATIC_PROFILE == 'production':
+    STATICFILES_STORAGE = 'core.storage.PurgedCompressedManifestStorage'
+else:
+    WHITENOISE_USE_FINDERS = True
+    WHITENOISE_AUTOREFRESH = True
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Ширины миниатюр картинок постов для srcset (см. posts/thumbnails.py)
+POST_IMAGE_WIDTHS = [320, 640, 960]
+# Pillow 10 убрал Image.ANTIALIAS, на который опирается PIL-движок sorl
+THUMBNAIL_ENGINE = 'posts.thumbnails.Engine'
+THUMBNAIL_QUALITY = 85
+
+# CSS, из которых при сборке удаляются правила, не нужные шаблонам
+PURGE_CSS = ['css/bootstrap.min.css']
+# Где искать имена классов, которые используют шаблоны и формы
+PURGE_CSS_SOURCES = [TEMPLATES_DIR] + [
+    os.path.join(BASE_DIR, app) for app in ('posts', 'users', 'about', 'core')
+]
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -144,3 +236,81 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POST_PER_PAGE: int = 10  # Кол-во постов на странице
+
+POST_CARD_CACHE_TIMEOUT: int = 60 * 60  # Время жизни карточки поста в кеше
+
+PAGE_CACHE_TIMEOUT: int = 60  # Время жизни страниц лент для анонимов
+
+# Потоковая отдача главной, групп и профиля: шапка страницы уходит первой,
+# посты — пачками по STREAM_CHUNK_SIZE. Страница постов всё равно читается
+# из базы до первого байта, а кеш страниц для анонимов при включённой
+# настройке не используется (см. posts/streaming.py)
+FEED_STREAMING: bool = os.environ.get('FEED_STREAMING') == '1'
+STREAM_CHUNK_SIZE: int = 100
+
+# Наибольший ?limit= для лент в API
+API_MAX_LIMIT: int = 100
+# Наибольшее число id в /api/v1/posts/batch/ и время жизни постов
+# в общем кеше запросов по id (см. api/cache.py)
+API_BATCH_MAX_IDS: int = 100
+API_POST_CACHE_TIMEOUT: int = 300
+
+# Подсчёт постов для паджинатора главной: 'exact' — COUNT(*) на каждый
+# запрос, 'estimated' — счётчик из кеша, который пересчитывает фоновая
+# задача (см. posts/counts.py); нужен общий для процессов кеш
+POST_COUNT_MODE: str = os.environ.get('POST_COUNT_MODE', 'exact')
+# Таблицы меньше этого числа строк в режиме 'estimated' считаются точно
+EXACT_COUNT_THRESHOLD: int = 10000
+# Как часто пересчитывается счётчик в режиме 'estimated', секунды
+COUNT_REFRESH_SECONDS: int = 300
+
+# С какого числа подписчиков посты не раскладываются по лентам,
+# а подмешиваются в ленту подписок при чтении
+TIMELINE_FANOUT_LIMIT: int = 1000
+TIMELINE_BACKFILL: int = 100  # Сколько постов добавить в ленту при подписке
+
+# Фоновые задачи (core/tasks.py). В режиме eager задачи выполняются
+# сразу при постановке, без воркера run_tasks.
+TASKS_EAGER: bool = os.environ.get('TASKS_EAGER', str(int(DEBUG))) == '1'
+# Через сколько секунд задача упавшего воркера возвращается в очередь
+TASKS_VISIBILITY_TIMEOUT: int = 300
+
+# Доля запросов, для которых снимаются замеры (0 — выключено). Замеры
+# включаются явно, например PERF_SAMPLE_RATE=0.05 в production: иначе
+# строки yatube.perf случайно попадают в вывод тестов и команд.
+PERF_SAMPLE_RATE: float = float(os.environ.get('PERF_SAMPLE_RATE', 0))
+PERF_SERVER_TIMING: bool = True  # Отдавать замеры в заголовке Server-Timing
+
+# Поиск медленных и повторяющихся запросов (см. core/queries.py)
+QUERY_INSPECTOR: bool = os.environ.get('QUERY_INSPECTOR') == '1'
+SLOW_QUERY_MS: float = 50  # Порог медленного запроса, мс
+DUPLICATE_QUERY_THRESHOLD: int = 3  # Сколько повторов формы считать N+1
+QUERY_INSPECTOR_LOG = os.path.join(BASE_DIR, 'queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'queries_file': {
+            'class': 'logging.FileHandler',
+            'filename': QUERY_INSPECTOR_LOG,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.perf': {'handlers': ['console'], 'level': 'INFO'},
+        # Повторы и окончательные ошибки фоновых задач (core/tasks.py)
+        'yatube.tasks': {
+            'handlers': ['console'],
+            'level': os.environ.get('TASKS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'yatube.queries': {
+            'handlers': ['queries_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}